@@ -67,6 +67,18 @@ sudo usermod -a -G video $USER
 # Set up udev rules for graphics/framebuffer access
 echo 'SUBSYSTEM=="graphics", GROUP="video", MODE="0660"' | sudo tee /etc/udev/rules.d/99-graphics.rules > /dev/null
 echo 'KERNEL=="fb*", GROUP="video", MODE="0660"' | sudo tee -a /etc/udev/rules.d/99-graphics.rules > /dev/null
+# Let the video group toggle the fbcon cursor blink without sudo
+echo 'ACTION=="add", SUBSYSTEM=="graphics", KERNEL=="fbcon", RUN+="/bin/chgrp video /sys/class/graphics/fbcon/cursor_blink", RUN+="/bin/chmod g+w /sys/class/graphics/fbcon/cursor_blink"' | sudo tee -a /etc/udev/rules.d/99-graphics.rules > /dev/null
+
+# Let RTSP-over-UDP sockets actually get the 1 MiB receive buffer ffmpeg asks for;
+# the kernel silently caps SO_RCVBUF at rmem_max (~208 KiB by default) and I-frame
+# bursts from several HD cameras then drop packets and smear the picture
+sudo tee /etc/sysctl.d/99-smartpicam.conf > /dev/null << EOF
+net.core.rmem_max=12582912
+net.core.wmem_max=12582912
+net.core.netdev_max_backlog=5000
+EOF
+sudo sysctl -p /etc/sysctl.d/99-smartpicam.conf > /dev/null
 
 # 5. Create systemd service based on OS type
 echo "5. Creating systemd service for $OS_TYPE..."
@@ -12,21 +12,33 @@ Production Features:
 - Production logging and error handling
 """
 
-import json
 import logging
 import subprocess
 import time
 import signal
 import sys
 import os
+import select
 import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Deque
 from dataclasses import dataclass, field
 
+from smartpicam_core import config_fields, json_loads
+
 __version__ = "1.0.1"
 __author__ = "SmartCamDisplay Project"
 
+# Recent player output lines kept per camera for error reports
+STDERR_RING_SIZE = 1000
+
+# mpv prints this (--term-playing-msg) once playback has started
+PLAYER_READY_MARKER = "smartcamdisplay: playing"
+
+# Longest wait for a new player to report playback before judging it by liveness
+PLAYER_START_TIMEOUT = 5
+
 @dataclass
 class Camera:
     name: str
@@ -42,6 +54,9 @@ class Camera:
     retry_count: int = 0
     player_process: Optional[subprocess.Popen] = field(default=None, init=False)
     placeholder_process: Optional[subprocess.Popen] = field(default=None, init=False)
+    stderr_ring: Deque[str] = field(default_factory=lambda: deque(maxlen=STDERR_RING_SIZE), init=False)
+    player_ready: threading.Event = field(default_factory=threading.Event, init=False)  # Set on playback or exit
+    wake: threading.Event = field(default_factory=threading.Event, init=False)  # Set when the player exits or on shutdown
 
 @dataclass 
 class DisplayConfig:
@@ -62,6 +77,7 @@ class SmartCamDisplay:
         self.cameras: List[Camera] = []
         self.display_config: DisplayConfig = None
         self.running = False
+        self._shutdown_evt = threading.Event()
         self.camera_threads: Dict[int, threading.Thread] = {}
         self.setup_logging()
         
@@ -100,13 +116,13 @@ class SmartCamDisplay:
             # Check if X11 is already running
             if 'DISPLAY' not in os.environ:
                 # Look for running X11
-                result = subprocess.run(['pgrep', '-f', 'Xorg'], capture_output=True, text=True)
+                result = subprocess.run(['pgrep', '-f', 'Xorg'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 if result.returncode == 0:
                     # X11 is running, try common displays
                     for display in [':0', ':1']:
                         os.environ['DISPLAY'] = display
                         try:
-                            subprocess.run(['xset', 'r', 'off'], check=True, capture_output=True, timeout=5)
+                            subprocess.run(['xset', 'r', 'off'], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
                             self.logger.info(f"Connected to X11 display {display}")
                             break
                         except:
@@ -120,7 +136,7 @@ class SmartCamDisplay:
             
             # Test X11 access
             try:
-                subprocess.run(['xset', 'r', 'off'], check=True, capture_output=True, timeout=5)
+                subprocess.run(['xset', 'r', 'off'], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
                 self.logger.info(f"X11 display {os.environ.get('DISPLAY')} is accessible")
             except Exception as e:
                 self.logger.error(f"Cannot access X11 display: {e}")
@@ -142,7 +158,7 @@ class SmartCamDisplay:
         
         for package in ['mpv', 'feh', 'convert']:
             try:
-                subprocess.run(['which', package], check=True, capture_output=True)
+                subprocess.run(['which', package], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             except subprocess.CalledProcessError:
                 if package == 'convert':
                     missing_packages.append('imagemagick')
@@ -152,9 +168,9 @@ class SmartCamDisplay:
         if missing_packages:
             self.logger.info(f"Installing required packages: {', '.join(missing_packages)}")
             try:
-                subprocess.run(['sudo', 'apt', 'update'], capture_output=True, timeout=60)
+                subprocess.run(['sudo', 'apt', 'update'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
                 subprocess.run(['sudo', 'apt', 'install', '-y'] + missing_packages, 
-                              capture_output=True, timeout=300)
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=300)
                 self.logger.info("✓ Dependencies installed successfully")
             except Exception as e:
                 self.logger.warning(f"Could not install dependencies: {e}")
@@ -166,18 +182,23 @@ class SmartCamDisplay:
                 self.logger.error(f"Configuration file not found: {self.config_path}")
                 return False
                 
-            with open(self.config_path, 'r') as f:
-                config_data = json.load(f)
+            config_data = json_loads(Path(self.config_path).read_bytes())
                 
             display_data = config_data.get("display", {})
-            self.display_config = DisplayConfig(**display_data)
+            # Unknown keys (another profile's settings, typos) are ignored rather than fatal
+            display_fields = config_fields(DisplayConfig)
+            self.display_config = DisplayConfig(**{k: v for k, v in display_data.items() if k in display_fields})
             
             # Set logging level from config
             numeric_level = getattr(logging, self.display_config.log_level.upper(), logging.INFO)
             logging.getLogger().setLevel(numeric_level)
             
             cameras_data = config_data.get("cameras", [])
-            enabled_cameras = [Camera(**cam_data) for cam_data in cameras_data if cam_data.get("enabled", True)]
+            camera_fields = config_fields(Camera)
+            enabled_cameras = [
+                Camera(**{k: v for k, v in cam_data.items() if k in camera_fields})
+                for cam_data in cameras_data if cam_data.get("enabled", True)
+            ]
             
             if not enabled_cameras:
                 self.logger.error("No enabled cameras found in configuration")
@@ -197,16 +218,16 @@ class SmartCamDisplay:
             self.logger.info("Cleaning up desktop environment...")
             
             # Kill unclutter (causes X overlay)
-            subprocess.run(['pkill', '-f', 'unclutter'], capture_output=True)
+            subprocess.run(['pkill', '-f', 'unclutter'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             # Kill other potential overlay processes
             overlay_processes = ['conky', 'cairo-dock', 'plank', 'tint2', 'panel']
             for process in overlay_processes:
-                subprocess.run(['pkill', '-f', process], capture_output=True)
+                subprocess.run(['pkill', '-f', process], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             # Clear screen to black
             result = subprocess.run(['xsetroot', '-solid', 'black'], 
-                                  capture_output=True, timeout=10)
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
             if result.returncode == 0:
                 self.logger.info("✓ Desktop cleaned and screen cleared")
                 return True
@@ -256,7 +277,7 @@ class SmartCamDisplay:
                 temp_image
             ]
             
-            result = subprocess.run(cmd_convert, capture_output=True, timeout=10)
+            result = subprocess.run(cmd_convert, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
             if result.returncode != 0:
                 self.logger.warning(f"ImageMagick convert failed for {camera.name}, using fallback")
                 return self.show_colored_placeholder(camera)
@@ -390,27 +411,37 @@ class SmartCamDisplay:
             '--no-fs',                                           # Not fullscreen
             '--input-conf=/dev/null',                            # No input configuration
             '--no-input-cursor',                                 # Disable cursor input
+            '--term-playing-msg=' + PLAYER_READY_MARKER,         # Announce playback for readiness detection
             camera.url
         ]
         
         try:
+            camera.player_ready.clear()
             camera.player_process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                preexec_fn=lambda: signal.signal(signal.SIGINT, signal.SIG_IGN)
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,  # mpv logs info to stdout and errors to stderr; keep both in order
+                start_new_session=True  # Off the terminal's Ctrl-C; keeps the vfork/posix_spawn path
             )
             
-            # Give it time to start and stabilize
-            time.sleep(5)
+            # Keep the output pipe drained so a chatty player can never block on it
+            camera.stderr_ring.clear()
+            reader = threading.Thread(
+                target=self._drain_player_output, args=(camera, camera.player_process), daemon=True
+            )
+            reader.start()
+            
+            # Go as soon as mpv reports playback or exits; a silent but running player
+            # is still judged alive once the timeout passes
+            camera.player_ready.wait(PLAYER_START_TIMEOUT)
             
-            if camera.player_process.poll() is None:
+            if reader.is_alive() and camera.player_process.poll() is None:
                 camera.status = "connected"
                 self.logger.info(f"✓ {camera.name} camera player started successfully")
                 return True
             else:
-                _, stderr = camera.player_process.communicate()
-                self.logger.error(f"✗ {camera.name} player failed: {stderr.decode() if stderr else 'Unknown error'}")
+                reader.join(timeout=1)
+                self.logger.error(f"✗ {camera.name} player failed: {self._recent_stderr(camera) or 'Unknown error'}")
                 camera.status = "failed"
                 camera.player_process = None
                 return False
@@ -421,6 +452,46 @@ class SmartCamDisplay:
             camera.player_process = None
             return False
 
+    def _drain_player_output(self, camera: Camera, process: subprocess.Popen):
+        """Read a player's output without blocking into the camera's ring buffer"""
+        fd = process.stdout.fileno()
+        os.set_blocking(fd, False)
+        pending = b""
+        try:
+            while True:
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready:
+                    continue
+                try:
+                    chunk = os.read(fd, 4096)
+                except BlockingIOError:
+                    continue
+                if not chunk:
+                    break  # Player exited
+                # The status line redraws with bare carriage returns
+                *lines, pending = (pending + chunk).replace(b"\r", b"\n").split(b"\n")
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    text = line.decode(errors="replace")
+                    camera.stderr_ring.append(text)
+                    if PLAYER_READY_MARKER in text:
+                        camera.player_ready.set()
+        except (OSError, ValueError):
+            pass  # Pipe closed under us
+        if pending.strip():
+            camera.stderr_ring.append(pending.decode(errors="replace"))
+        try:
+            process.wait(timeout=5)  # Reap it so poll() already reports the exit
+        except subprocess.TimeoutExpired:
+            pass
+        camera.player_ready.set()  # Wake a waiting start; the player is gone
+        camera.wake.set()  # And the camera's monitor, so it recovers now rather than at its next check
+    
+    def _recent_stderr(self, camera: Camera, lines: int = 20) -> str:
+        """The last few output lines from a camera's player"""
+        return "\n".join(list(camera.stderr_ring)[-lines:])
+
     def stop_camera_player(self, camera: Camera):
         """Stop camera player and cleanup"""
         if camera.player_process:
@@ -445,17 +516,29 @@ class SmartCamDisplay:
             camera.placeholder_process = None
 
     def test_camera_connection(self, camera: Camera) -> bool:
-        """Test camera connection using FFmpeg"""
+        """Test camera connection with one ffprobe: the stream counts as up once it reports a video codec"""
         try:
+            # Opening the stream and reading its codec parameters is enough; decoding
+            # three seconds of video only held a second RTSP session open for longer
+            timeout = 30 if any(x in camera.url for x in ["118.93", "121.75"]) else 20
             cmd = [
-                'ffmpeg', '-rtsp_transport', 'tcp', '-i', camera.url,
-                '-t', '3', '-f', 'null', '-'
+                'ffprobe', '-v', 'error',
+                '-rtsp_transport', 'tcp',
+                '-timeout', str(timeout * 1000000),  # Socket timeout, in microseconds
+                '-select_streams', 'v:0',
+                '-show_entries', 'stream=codec_name',
+                '-of', 'json',
+                camera.url
             ]
             
-            timeout = 30 if any(x in camera.url for x in ["118.93", "121.75"]) else 20
-            result = subprocess.run(cmd, capture_output=True, timeout=timeout)
-            return result.returncode == 0
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout)
+            if result.returncode != 0:
+                return False
+            return bool(json_loads(result.stdout).get("streams"))
             
+        except ValueError:
+            self.logger.warning(f"✗ {camera.name} connection test returned unreadable output")
+            return False
         except subprocess.TimeoutExpired:
             self.logger.warning(f"✗ {camera.name} connection test timed out")
             return False
@@ -502,6 +585,8 @@ class SmartCamDisplay:
                 if camera.player_process and camera.player_process.poll() is not None:
                     # Camera process died, mark for retry
                     self.logger.warning(f"Camera {camera.name} player died, marking for retry")
+                    if camera.stderr_ring:
+                        self.logger.warning(f"Last output from {camera.name} player:\n{self._recent_stderr(camera)}")
                     camera.status = "failed"
                     camera.player_process = None
                     self.show_placeholder_image(camera)
@@ -513,7 +598,9 @@ class SmartCamDisplay:
                         camera.status = "failed"
                         self.show_placeholder_image(camera)
             
-            time.sleep(10)  # Check every 10 seconds
+            # Check every 10 seconds, or at once when the player exits or shutdown begins
+            camera.wake.wait(10)
+            camera.wake.clear()
 
     def start_all_camera_monitors(self):
         """Start monitoring threads for all cameras"""
@@ -543,7 +630,7 @@ class SmartCamDisplay:
                            f"Testing={status_counts['testing']}, "
                            f"Placeholder={status_counts['placeholder']}")
             
-            time.sleep(60)  # Status update every minute
+            self._shutdown_evt.wait(60)  # Status update every minute
 
     def stop_all_cameras(self):
         """Stop all camera processes and cleanup"""
@@ -554,9 +641,9 @@ class SmartCamDisplay:
         
         # Kill any remaining processes
         try:
-            subprocess.run(['pkill', '-f', 'mpv'], capture_output=True)
-            subprocess.run(['pkill', '-f', 'feh'], capture_output=True)
-            subprocess.run(['pkill', '-f', 'xterm.*placeholder'], capture_output=True)
+            subprocess.run(['pkill', '-f', 'mpv'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            subprocess.run(['pkill', '-f', 'feh'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            subprocess.run(['pkill', '-f', 'xterm.*placeholder'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except:
             pass
         
@@ -593,13 +680,15 @@ class SmartCamDisplay:
         self.logger.info(f"Displaying {len(self.cameras)} cameras on {self.display_config.screen_width}x{self.display_config.screen_height} screen")
         
         try:
-            # Keep main thread alive
-            while self.running:
-                time.sleep(1)
+            # Block until a shutdown signal; no periodic wakeups
+            self._shutdown_evt.wait()
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal, shutting down...")
         finally:
             self.running = False
+            self._shutdown_evt.set()  # Release the monitor threads from their waits
+            for camera in self.cameras:
+                camera.wake.set()
             self.stop_all_cameras()
             
         self.logger.info("SmartCamDisplay shutdown complete")
@@ -609,8 +698,9 @@ def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     global app
     if 'app' in globals():
-        app.running = False
-    sys.exit(0)
+        app._shutdown_evt.set()
+    else:
+        sys.exit(0)
 
 def main():
     """Main entry point"""
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 
-import json
 import logging
 import subprocess
 import time
@@ -8,12 +7,14 @@ import signal
 import sys
 import os
 import shlex
-from pathlib import Path
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict, Optional, Deque
+from collections import deque
 from dataclasses import dataclass
-import threading
 
-@dataclass
+from smartpicam_core import SmartPiCamBase, DECODER_THREAD_ARGS, LOW_DELAY_INPUT_ARGS, PROBE_CACHE_TTL, DNS_CACHE_TTL, xstack_filter
+
+@dataclass(slots=True, frozen=True)
 class Camera:
     name: str
     url: str
@@ -24,7 +25,7 @@ class Camera:
     height: int
     enabled: bool = True
 
-@dataclass 
+@dataclass(slots=True, frozen=True)
 class DisplayConfig:
     screen_width: int = 1920
     screen_height: int = 1080
@@ -35,332 +36,492 @@ class DisplayConfig:
     network_timeout: int = 30
     restart_retries: int = 3
     log_level: str = "INFO"
+    # Display sink: "fbdev" (/dev/fb0, RGB565) or "drm" (YUV straight to a KMS plane via SDL2)
+    output: str = "fbdev"
+
+# How often the monitor checks the config file for edits
+CONFIG_CHECK_INTERVAL = 5
+
+# RTSP over the default UDP transport: a 1 MiB socket buffer absorbs I-frame bursts,
+# the reorder queue rides out out-of-order packets for at most max_delay, and the
+# socket timeout drops a dead camera after 5 s instead of hanging the grid.
+# The SDP already names the codec, so stream analysis is skipped: the grid opens
+# its inputs one after another and each analysis would otherwise add seconds
+RTSP_INPUT_ARGS = (
+    "-probesize", "32",
+    "-analyzeduration", "0",
+    "-buffer_size", "1048576",
+    "-reorder_queue_size", "1000",
+    "-max_delay", "500000",
+    "-timeout", "5000000",
+)
+
+# Grid filter templates
+SCALE_FILTER = "[{i}:v]scale={w}:{h}:flags=fast_bilinear,format=yuv420p[v{i}]".format
+OVERLAY_FILTER = "{source}[v{i}]overlay={x}:{y}{sink}".format
+
+# HTTP(S) inputs share the one grid process, so let ffmpeg reconnect a dropped
+# camera itself rather than the whole grid restarting (http protocol options only)
+HTTP_INPUT_ARGS = (
+    "-reconnect", "1",
+    "-reconnect_streamed", "1",
+    "-reconnect_delay_max", "5",
+)
+
+# FFmpeg stderr lines that mean a camera connection is in trouble
+STDERR_NETWORK_ERRORS = ("No route to host", "Connection refused", "Connection timed out", "Connection reset", "404 Not Found")
+
+# FFmpeg's stderr is drained in chunks of this size; an unterminated line is capped at it too
+STDERR_READ_SIZE = 4096
 
-class SmartPiCam:
+# FFmpeg prints these once every input is open and output has begun
+STDERR_READY_MARKERS = ("Output #0", "Press [q] to stop")
+
+class SmartPiCam(SmartPiCamBase):
+    camera_class = Camera
+    display_config_class = DisplayConfig
+    banner = "SmartPiCam v2.0 - FFmpeg Grid Display for Pi OS Lite"
+    
     def __init__(self, config_path: str = "config/smartpicam.json"):
-        self.config_path = config_path
+        super().__init__(config_path)
         self.cameras: List[Camera] = []
         self.display_config: DisplayConfig = None
-        self.ffmpeg_process: Optional[subprocess.Popen] = None
-        self.running = False
-        self.cursor_hidden = False
-        self.setup_logging()
-        
-    def setup_logging(self):
-        """Configure logging"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger("smartpicam")
-        self.logger.info("SmartPiCam v2.0 - FFmpeg Grid Display for Pi OS Lite")
-        
-    def _hide_cursor(self):
-        """Hide the console cursor to prevent flickering"""
-        try:
-            # Hide cursor using escape sequence
-            sys.stdout.write('\033[?25l')
-            sys.stdout.flush()
-            
-            # Also try to hide cursor on all consoles
-            subprocess.run(['sudo', 'sh', '-c', 'echo 0 > /sys/class/graphics/fbcon/cursor_blink'], 
-                         capture_output=True, timeout=5)
-            
-            # Set console to not show cursor
-            subprocess.run(['setterm', '-cursor', 'off'], 
-                         capture_output=True, timeout=5)
-            
-            self.cursor_hidden = True
-            self.logger.info("Console cursor hidden")
-            
-        except Exception as e:
-            self.logger.warning(f"Could not hide cursor: {e}")
+        self.ffmpeg_process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._stderr_tail: Deque[str] = deque(maxlen=50)
+        self._start_verdict: Optional[asyncio.Future] = None  # True once running, False on a startup error
+        self._shutdown_evt = asyncio.Event()
+        self._cached_cmd: Optional[List[str]] = None
+        self._cmd_built_at = 0.0  # Monotonic; the cached argv's addresses age out with the DNS cache
+        self._cmd_urls: Dict[str, str] = {}  # camera url -> input url the cached argv actually uses
+        self._filter_string: Optional[str] = None
+        self._cmd_tail: List[str] = []  # Filter graph and display output, fixed by the layout
     
-    def _show_cursor(self):
-        """Show the console cursor again"""
-        try:
-            if self.cursor_hidden:
-                # Show cursor using escape sequence
-                sys.stdout.write('\033[?25h')
-                sys.stdout.flush()
-                
-                # Restore cursor on consoles
-                subprocess.run(['sudo', 'sh', '-c', 'echo 1 > /sys/class/graphics/fbcon/cursor_blink'], 
-                             capture_output=True, timeout=5)
-                
-                # Set console to show cursor
-                subprocess.run(['setterm', '-cursor', 'on'], 
-                             capture_output=True, timeout=5)
-                
-                self.cursor_hidden = False
-                self.logger.info("Console cursor restored")
-                
-        except Exception as e:
-            self.logger.warning(f"Could not restore cursor: {e}")
+    def _prepare_config(self):
+        # The layout is fixed until the config changes: the filter graph is built once and
+        # every restart reuses one argv; only a re-resolved input rebuilds the argv
+        self._filter_string = self._build_filter_complex()
+        self._cmd_tail = self._build_output_args()
+        self._cached_cmd = self._build_ffmpeg_grid_command()
+    
+    def _build_filter_complex(self) -> str:
+        """Build the grid filter graph: scale every input, then composite them onto one black frame"""
+        # Fast scaling straight into 12-bit yuv420p, which xstack/overlay work in natively;
+        # RGB565 (16-bit) is only produced once, after compositing
+        config = self.display_config
+        sink = ",format=yuv420p" if config.output == "drm" else ",format=rgb565le"  # The KMS plane scans out YUV itself
+        scaled = [SCALE_FILTER(i=i, w=camera.width, h=camera.height) for i, camera in enumerate(self.cameras)]
         
-    def load_config(self) -> bool:
-        """Load configuration from JSON file"""
-        try:
-            with open(self.config_path, 'r') as f:
-                config_data = json.load(f)
-                
-            # Parse display config
-            display_data = config_data.get("display", {})
-            self.display_config = DisplayConfig(**display_data)
-            
-            # Set logging level
-            numeric_level = getattr(logging, self.display_config.log_level.upper(), logging.INFO)
-            logging.getLogger().setLevel(numeric_level)
-            
-            # Parse cameras
-            cameras_data = config_data.get("cameras", [])
-            enabled_cameras = [Camera(**cam_data) for cam_data in cameras_data if cam_data.get("enabled", True)]
-            
-            if not enabled_cameras:
-                self.logger.error("No enabled cameras found in configuration")
-                return False
-                
-            self.cameras = enabled_cameras
-            self.logger.info(f"Loaded configuration with {len(self.cameras)} enabled cameras")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to load config: {e}")
-            return False
+        if len(self.cameras) > 1:
+            # xstack writes each tile once into a single output frame instead of
+            # an overlay pass per camera over a generated background
+            labels = "".join(f"[v{i}]" for i in range(len(self.cameras)))
+            stacked = xstack_filter(self.cameras, config.screen_width, config.screen_height)
+            return ";".join([*scaled, f"{labels}{stacked}{sink}"])
+        
+        # xstack needs at least two inputs
+        last = len(self.cameras) - 1
+        background = f"color=black:{config.screen_width}x{config.screen_height},format=yuv420p[bg]"
+        return ";".join([
+            *scaled,
+            background,
+            *[
+                OVERLAY_FILTER(
+                    source="[bg]" if i == 0 else f"[tmp{i - 1}]",
+                    i=i, x=camera.x, y=camera.y,
+                    sink=sink if i == last else f"[tmp{i}]"
+                )
+                for i, camera in enumerate(self.cameras)
+            ],
+        ])
     
     def _build_ffmpeg_grid_command(self) -> List[str]:
         """Build FFmpeg command for grid layout with correct framebuffer pixel format"""
         if not self.cameras:
             return []
         
-        # Basic command with minimal options for maximum compatibility
-        cmd = ["ffmpeg", "-y"]
+        # Basic command with minimal options for maximum compatibility. No stats line: it redraws
+        # with bare carriage returns forever; info level still prints the readiness markers
+        cmd = ["ffmpeg", "-y", "-nostats", "-loglevel", "info", "-filter_complex_threads", "2"]
+        self._cmd_urls = {}
+        self._cmd_built_at = time.monotonic()
         
         # Add input streams with only basic options
         for i, camera in enumerate(self.cameras):
+            if camera.url.startswith("rtsp://"):
+                cmd.extend(RTSP_INPUT_ARGS)  # ffmpeg rejects RTSP-only options on other inputs
+            elif camera.url.startswith(("http://", "https://")):
+                cmd.extend(HTTP_INPUT_ARGS)
+            self._cmd_urls[camera.url] = self._resolve_url(camera.url)
             cmd.extend([
-                "-i", camera.url
+                *LOW_DELAY_INPUT_ARGS,
+                *DECODER_THREAD_ARGS,
+                "-i", self._cmd_urls[camera.url]
             ])
         
-        # Build filter graph for custom grid layout
-        filter_complex = []
+        cmd.extend(self._cmd_tail)
+        return cmd
+    
+    def _build_output_args(self) -> List[str]:
+        """Filter graph and display sink arguments; unlike the inputs, these never need re-resolving"""
+        args = ["-filter_complex", self._filter_string]
         
-        # Scale each input to the desired size and add labels
-        for i, camera in enumerate(self.cameras):
-            # Simple scaling without format conversion
-            scale_filter = f"[{i}:v]scale={camera.width}:{camera.height}[v{i}]"
-            filter_complex.append(scale_filter)
+        if self.display_config.output == "drm":
+            # SDL2's KMS/DRM backend page-flips a YUV plane at vsync, so the
+            # display controller does the colour conversion instead of the CPU
+            args.extend([
+                "-f", "sdl2",
+                "-window_fullscreen", "1",
+                "-window_borderless", "1",
+                "smartpicam"
+            ])
+        else:
+            args.extend([
+                "-f", "fbdev", "/dev/fb0",
+                "-pix_fmt", "rgb565le"  # Force correct pixel format for framebuffer
+            ])
         
-        # Create black background
-        background = f"color=black:{self.display_config.screen_width}x{self.display_config.screen_height}[bg]"
-        filter_complex.append(background)
+        return args
+    
+    async def _probe_camera(self, camera: Camera, deadline: float) -> bool:
+        """Probe one camera stream with ffprobe, giving up at the shared deadline"""
+        probe_cmd = ["ffprobe", "-v", "error"]
+        if camera.url.startswith("rtsp://"):
+            probe_cmd.extend([
+                "-rtsp_transport", "tcp",
+                "-timeout", "5000000"  # Give up on a dead camera after 5 seconds
+            ])
+        probe_cmd.extend([
+            "-show_entries", "stream=codec_type",  # Stream info only, no decoding
+            "-of", "csv=p=0",
+            camera.url
+        ])
         
-        # Overlay each camera at its position
-        overlay_chain = "[bg]"
-        for i, camera in enumerate(self.cameras):
-            if i == len(self.cameras) - 1:
-                # Last overlay - add format conversion for framebuffer
-                overlay = f"{overlay_chain}[v{i}]overlay={camera.x}:{camera.y},format=rgb565le"
-            else:
-                overlay = f"{overlay_chain}[v{i}]overlay={camera.x}:{camera.y}[tmp{i}]"
-                overlay_chain = f"[tmp{i}]"
-            filter_complex.append(overlay)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *probe_cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+        except Exception as e:
+            self.logger.warning("✗ %s stream test error: %s - continuing anyway", camera.name, e)
+            return False
         
-        # Join all filters
-        filter_string = ";".join(filter_complex)
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), max(0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            self.logger.warning("✗ %s stream test timed out - continuing anyway", camera.name)
+            return False
         
-        cmd.extend([
-            "-filter_complex", filter_string,
-            "-f", "fbdev", "/dev/fb0",
-            "-pix_fmt", "rgb565le"  # Force correct pixel format for framebuffer
-        ])
+        if process.returncode == 0:
+            self.logger.info("✓ %s stream is accessible", camera.name)
+            return True
         
-        return cmd
+        self.logger.warning("✗ %s stream test failed: %s", camera.name, stderr.decode(errors='replace'))
+        # Continue anyway - let FFmpeg handle it
+        return False
     
-    def _test_camera_streams(self) -> bool:
-        """Test individual camera streams before starting grid"""
+    async def _test_camera_streams(self) -> bool:
+        """Probe all camera streams concurrently before starting grid"""
         self.logger.info("Testing individual camera streams...")
         
+        # Every probe runs at once so the total wait is the slowest camera, not the sum
+        deadline = time.monotonic() + 10
+        now = time.time()  # Cache entries are wall clock so they can outlive this process
+        to_probe = []
         for camera in self.cameras:
-            self.logger.info(f"Testing {camera.name}: {camera.url}")
+            cached = self._probe_cache.get(camera.url)
+            if cached and now - cached[0] < PROBE_CACHE_TTL:
+                status = "accessible" if cached[1] else "failed"
+                self.logger.info("%s %s stream %s (probed %.0fs ago)", '✓' if cached[1] else '✗', camera.name, status, now - cached[0])
+                continue
             
-            test_cmd = [
-                "ffmpeg", "-y",
-                "-i", camera.url,
-                "-t", "1",  # Test for 1 second
-                "-f", "null", "-"
-            ]
-            
-            try:
-                result = subprocess.run(
-                    test_cmd,
-                    capture_output=True,
-                    timeout=15,
-                    text=True
-                )
-                
-                if result.returncode == 0:
-                    self.logger.info(f"✓ {camera.name} stream is accessible")
-                else:
-                    self.logger.warning(f"✗ {camera.name} stream test failed: {result.stderr}")
-                    # Continue anyway - let FFmpeg handle it
-                    
-            except subprocess.TimeoutExpired:
-                self.logger.warning(f"✗ {camera.name} stream test timed out - continuing anyway")
-            except Exception as e:
-                self.logger.warning(f"✗ {camera.name} stream test error: {e} - continuing anyway")
+            self.logger.info("Testing %s: %s", camera.name, camera.url)
+            to_probe.append(camera)
+        
+        results = await asyncio.gather(*[self._probe_camera(camera, deadline) for camera in to_probe])
+        probed_at = time.time()
+        for camera, ok in zip(to_probe, results):
+            self._probe_cache[camera.url] = (probed_at, ok)
+        if to_probe:
+            self._save_probe_cache()
                 
         return True  # Always continue
     
-    def start_display(self) -> bool:
+    async def _invalidate_probes(self, error_output: str):
+        """Forget cached probe results and addresses for cameras named in FFmpeg's error output"""
+        implicated = False
+        for camera in self.cameras:
+            # FFmpeg names the input as it was given, i.e. with the address resolved when the argv was built
+            used_url = self._cmd_urls.get(camera.url, camera.url)
+            if used_url not in error_output and camera.url not in error_output:
+                continue
+            implicated = True
+            self._forget_resolution(camera.url)
+            if self._probe_cache.pop(camera.url, None):
+                self.logger.info("%s implicated in FFmpeg failure - will re-probe", camera.name)
+        if implicated:
+            # The camera may have moved; resolve its hostname again for the restart, off the event loop
+            self._cached_cmd = await asyncio.to_thread(self._build_ffmpeg_grid_command)
+    
+    async def _read_stderr(self, process: asyncio.subprocess.Process):
+        """Drain FFmpeg's stderr in chunks so the pipe can never fill and stall it"""
+        pending = b""
+        while True:
+            try:
+                chunk = await process.stderr.read(STDERR_READ_SIZE)
+            except Exception as e:
+                self.logger.error("FFmpeg stderr reader failed: %s", e)
+                return
+            if not chunk:
+                break  # FFmpeg exited
+            # Status redraws end in bare carriage returns; a line reader would wait for a newline forever
+            *lines, pending = (pending + chunk).replace(b"\r", b"\n").split(b"\n")
+            pending = pending[-STDERR_READ_SIZE:]
+            for line in lines:
+                try:
+                    self._handle_stderr_line(line.decode(errors="replace").rstrip())
+                except Exception as e:
+                    # Keep draining regardless: a full pipe would stall FFmpeg
+                    self.logger.error("Could not handle FFmpeg output %r: %s", line, e)
+        self._handle_stderr_line(pending.decode(errors="replace").rstrip())
+    
+    def _handle_stderr_line(self, line: str):
+        """Keep one stderr line and act on connection errors or readiness"""
+        if not line:
+            return
+        self._stderr_tail.append(line)
+        if any(pattern in line for pattern in STDERR_NETWORK_ERRORS):
+            self.logger.warning("FFmpeg: %s", line)
+            self._settle_start(False)
+        else:
+            self.logger.debug("FFmpeg: %s", line)
+            if any(marker in line for marker in STDERR_READY_MARKERS):
+                self._settle_start(True)
+    
+    def _settle_start(self, started: bool):
+        """Report the startup outcome to start_display, once"""
+        if self._start_verdict and not self._start_verdict.done():
+            self._start_verdict.set_result(started)
+    
+    def _stderr_text(self) -> str:
+        """Recent FFmpeg stderr output"""
+        return "\n".join(self._stderr_tail)
+    
+    async def start_display(self) -> bool:
         """Start the FFmpeg grid display"""
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
+        if self.is_healthy():
             self.logger.warning("Display already running")
             return True
         
         # Hide cursor before starting display
         self._hide_cursor()
         
-        # Test streams first
-        if not self._test_camera_streams():
-            self.logger.error("Camera stream tests failed - not starting display")
-            return False
-            
-        cmd = self._build_ffmpeg_grid_command()
+        # The probes only report and cache results - they never gate the grid -
+        # so they run while FFmpeg opens its inputs instead of ahead of it
+        probe_task = asyncio.create_task(self._test_camera_streams())
+        try:
+            return await self._launch_grid()
+        finally:
+            await probe_task
+    
+    async def _launch_grid(self) -> bool:
+        """Launch the grid FFmpeg and wait for it to report its output running"""
+        if self._cached_cmd and time.monotonic() - self._cmd_built_at >= DNS_CACHE_TTL:
+            # The pre-resolved addresses are past their TTL; resolve the hostnames again.
+            # getaddrinfo blocks, so it runs in a worker thread rather than stalling the loop
+            self._cached_cmd = await asyncio.to_thread(self._build_ffmpeg_grid_command)
+        cmd = self._cached_cmd
         if not cmd:
             self.logger.error("Failed to build FFmpeg command")
             return False
         
         self.logger.info("Starting FFmpeg grid display...")
-        self.logger.info(f"FFmpeg command: {' '.join(cmd)}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("FFmpeg command: %s", shlex.join(cmd))
         
         try:
             # Set environment for framebuffer access
             env = os.environ.copy()
             env.pop('DISPLAY', None)  # Remove X11 display for framebuffer mode
+            if self.display_config.output == "drm":
+                env['SDL_VIDEODRIVER'] = 'kmsdrm'
             
-            self.ffmpeg_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
+            self._stderr_tail.clear()
+            self._start_verdict = asyncio.get_running_loop().create_future()
+            self.ffmpeg_process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
-                preexec_fn=lambda: signal.signal(signal.SIGINT, signal.SIG_IGN),
+                start_new_session=True,  # Off the terminal's Ctrl-C; keeps the vfork/posix_spawn path
                 env=env
             )
+            self._prioritise_ffmpeg(self.ffmpeg_process.pid)
+            self._stderr_task = asyncio.create_task(self._read_stderr(self.ffmpeg_process))
             
-            # Give FFmpeg time to initialize
-            time.sleep(5)
+            # Wait for FFmpeg to report its output running, a connection error, or exit
+            exit_task = asyncio.create_task(self.ffmpeg_process.wait())
+            await asyncio.wait(
+                {self._start_verdict, exit_task},
+                timeout=self.display_config.network_timeout,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            exit_task.cancel()
             
-            if self.ffmpeg_process.poll() is None:
+            started = self._start_verdict.result() if self._start_verdict.done() else self.is_healthy()
+            if started and self.is_healthy():
                 self.logger.info("FFmpeg grid display started successfully")
                 self._log_camera_layout()
                 return True
-            else:
-                stdout, stderr = self.ffmpeg_process.communicate()
-                self.logger.error(f"FFmpeg failed to start:")
-                self.logger.error(f"STDOUT: {stdout.decode() if stdout else 'None'}")
-                self.logger.error(f"STDERR: {stderr.decode() if stderr else 'None'}")
-                return False
+            
+            if self.is_healthy():
+                self.ffmpeg_process.terminate()  # A camera failed to open; don't leave it half up
+                await self.ffmpeg_process.wait()
+            await self._stderr_task
+            self.logger.error("FFmpeg failed to start:")
+            self.logger.error("STDERR: %s", self._stderr_text() or 'None')
+            return False
                 
         except Exception as e:
-            self.logger.error(f"Failed to start FFmpeg: {e}")
+            self.logger.error("Failed to start FFmpeg: %s", e)
             return False
     
     def _log_camera_layout(self):
         """Log the camera layout for debugging"""
         self.logger.info("Camera layout:")
         for camera in self.cameras:
-            self.logger.info(f"  {camera.name}: ({camera.x},{camera.y}) {camera.width}x{camera.height}")
+            self.logger.info("  %s: (%d,%d) %dx%d", camera.name, camera.x, camera.y, camera.width, camera.height)
     
-    def stop_display(self):
+    async def stop_display(self):
         """Stop the FFmpeg display"""
         if self.ffmpeg_process:
             try:
-                self.ffmpeg_process.terminate()
-                self.ffmpeg_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
+                if self.ffmpeg_process.returncode is None:
+                    self.ffmpeg_process.terminate()
+                await asyncio.wait_for(self.ffmpeg_process.wait(), 10)
+            except asyncio.TimeoutError:
                 self.ffmpeg_process.kill()
-                self.ffmpeg_process.wait()
+                await self.ffmpeg_process.wait()
             finally:
                 self.ffmpeg_process = None
                 self.logger.info("FFmpeg display stopped")
         
+        if self._stderr_task:
+            await self._stderr_task
+            self._stderr_task = None
+        
         # Restore cursor when stopping
         self._show_cursor()
                 
     def is_healthy(self) -> bool:
         """Check if display is running properly"""
-        return self.ffmpeg_process is not None and self.ffmpeg_process.poll() is None
+        return self.ffmpeg_process is not None and self.ffmpeg_process.returncode is None
+        
+    async def _reload_config_if_changed(self):
+        """Apply an edited config file, restarting FFmpeg only if its command changed"""
+        try:
+            stamp = self._stat_config()
+        except OSError:
+            return
+        if stamp == self._config_stamp:
+            return
         
-    def monitor_display(self):
+        self.logger.info("Configuration file changed - reloading")
+        old_cmd = self._cached_cmd
+        # Building the argv resolves camera hostnames; keep the blocking lookups off the loop
+        if not await asyncio.to_thread(self.load_config):
+            self.logger.warning("Keeping the running display after the failed reload")
+            self._config_stamp = stamp  # Don't retry until the file is edited again
+            return
+        
+        if self._cached_cmd == old_cmd:
+            self.logger.info("Camera layout unchanged - display keeps running")
+            return
+        
+        self.logger.info("Camera layout changed - restarting display")
+        await self.stop_display()
+        await self.start_display()
+    
+    async def monitor_display(self):
         """Monitor and restart display if it fails"""
         restart_count = 0
         
         while self.running:
-            if not self.is_healthy():
-                if restart_count >= self.display_config.restart_retries:
-                    self.logger.error(f"Max restart attempts ({self.display_config.restart_retries}) reached")
-                    break
-                
-                restart_count += 1
-                self.logger.warning(f"Display is unhealthy, attempting restart ({restart_count}/{self.display_config.restart_retries})")
-                
-                # Get error output before stopping
-                if self.ffmpeg_process:
-                    try:
-                        stdout, stderr = self.ffmpeg_process.communicate(timeout=1)
-                        if stderr:
-                            self.logger.error(f"FFmpeg error output: {stderr.decode()}")
-                    except:
-                        pass
-                
-                self.stop_display()
-                time.sleep(5)
-                
-                if self.start_display():
-                    restart_count = 0  # Reset counter on successful restart
-                    
-            time.sleep(10)  # Check every 10 seconds
+            # Wake the moment FFmpeg exits; the timeout only paces config edit checks
+            if self.is_healthy():
+                try:
+                    await asyncio.wait_for(self.ffmpeg_process.wait(), CONFIG_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    await self._reload_config_if_changed()
+                    continue
+            else:
+                await asyncio.sleep(10)
+            if not self.running:
+                break
             
-    def run(self):
-        """Main run loop"""
-        if not self.load_config():
+            if restart_count >= self.display_config.restart_retries:
+                self.logger.error("Max restart attempts (%d) reached", self.display_config.restart_retries)
+                break
+            
+            restart_count += 1
+            self.logger.warning("Display is unhealthy, attempting restart (%d/%d)", restart_count, self.display_config.restart_retries)
+            
+            # Get error output before stopping
+            if self._stderr_task:
+                await self._stderr_task
+            if self._stderr_tail:
+                error_output = self._stderr_text()
+                self.logger.error("FFmpeg error output: %s", error_output)
+                await self._invalidate_probes(error_output)
+            
+            await self.stop_display()
+            await asyncio.sleep(5)
+            
+            if await self.start_display():
+                restart_count = 0  # Reset counter on successful restart
+    
+    async def _run(self) -> bool:
+        """Start the display, then monitor it until a shutdown signal arrives"""
+        if not await asyncio.to_thread(self.load_config):  # Resolves camera hostnames
             return False
+        
+        # The event loop and probes share core 0 with IRQs; ffmpeg gets the rest
+        self._pin_to_housekeeping()
+        
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._shutdown_evt.set)
             
-        if not self.start_display():
+        if not await self.start_display():
             self.logger.error("Failed to start display")
             return False
             
         self.running = True
         
-        # Start monitoring thread
-        monitor_thread = threading.Thread(target=self.monitor_display, daemon=True)
-        monitor_thread.start()
+        # Monitor in the same event loop - no extra thread
+        monitor_task = asyncio.create_task(self.monitor_display())
         
         try:
-            # Keep main thread alive
-            while self.running:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            self.logger.info("Received interrupt signal, shutting down...")
+            # Block until a shutdown signal arrives
+            await self._shutdown_evt.wait()
+            self.logger.info("Received shutdown signal, shutting down...")
         finally:
-            self.stop_display()
+            self.running = False
+            monitor_task.cancel()
+            await asyncio.gather(monitor_task, return_exceptions=True)
+            await self.stop_display()
             
         return True
-
-def signal_handler(signum, frame):
-    """Handle shutdown signals"""
-    global app
-    if 'app' in globals():
-        app.stop_display()
-    sys.exit(0)
+            
+    def run(self) -> bool:
+        """Main run loop"""
+        return asyncio.run(self._run())
 
 def main():
-    global app
-    
-    # Set up signal handlers
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
-    
     app = SmartPiCam()
     app.logger.info("Starting SmartPiCam with FFmpeg grid display...")
     
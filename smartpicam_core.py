@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Shared core of the SmartPiCam framebuffer displays.
+
+smartpicam.py and smartpicam_improved.py differ only in how they turn a
+loaded config into ffmpeg processes. Config loading, console cursor handling
+and the constants both rely on live here once; each script subclasses
+SmartPiCamBase, names its Camera/DisplayConfig dataclasses and overrides
+_prepare_config() and _build_ffmpeg_grid_command().
+"""
+
+import json
+import logging
+import os
+import fcntl
+import functools
+import hashlib
+import ipaddress
+import socket
+import threading
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, FrozenSet
+from dataclasses import fields
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads  # Accepts bytes too
+
+FBCON_CURSOR_BLINK = "/sys/class/graphics/fbcon/cursor_blink"
+
+# ANSI cursor visibility escapes, written straight to fd 1
+HIDE_CURSOR = b'\x1b[?25l'
+SHOW_CURSOR = b'\x1b[?25h'
+
+# Console VT mode switching (linux/kd.h)
+CONSOLE_TTY = "/dev/tty0"
+KDSETMODE = 0x4B3A
+KD_TEXT = 0x00
+KD_GRAPHICS = 0x01
+
+# How long a stream probe result is trusted before a restart probes again
+PROBE_CACHE_TTL = 60
+
+# Probe results are kept here across service restarts, keyed by a hash of the URL
+# so camera credentials never land on disk
+PROBE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "smartpicam", "probes.json")
+
+# How long a pre-resolved camera hostname is trusted before a rebuild asks DNS again
+DNS_CACHE_TTL = 300
+
+# Hand packets and frames on the moment they arrive instead of filling the
+# demuxer's buffers and waiting out B-frame reordering delay in the decoder
+LOW_DELAY_INPUT_ARGS = ("-fflags", "nobuffer", "-flags", "low_delay")
+
+# Core 0 stays with the Python threads and IRQs; every ffmpeg gets the rest
+HOUSEKEEPING_CPUS = {0}
+FFMPEG_NICENESS = -10
+
+# One slice-threaded decode thread per stream: frame threading would add a frame of
+# latency per thread and N cameras x auto threads oversubscribes a 4-core Pi
+DECODER_THREAD_ARGS = ("-threads", "1", "-thread_type", "slice")
+
+@functools.cache
+def config_fields(cls) -> FrozenSet[str]:
+    """Config keys a dataclass accepts; anything else in the JSON is ignored"""
+    return frozenset(f.name for f in fields(cls) if f.init)
+
+def xstack_filter(cameras: List, screen_width: int, screen_height: int) -> str:
+    """One-pass grid composite: xstack places every tile at its x/y, padded out to the screen"""
+    layout = "|".join(f"{camera.x}_{camera.y}" for camera in cameras)
+    stacked = f"xstack=inputs={len(cameras)}:layout={layout}:fill=black"
+    # xstack's output reaches exactly as far as the furthest tile; trim or pad it to the screen
+    width = max(camera.x + camera.width for camera in cameras)
+    height = max(camera.y + camera.height for camera in cameras)
+    if width > screen_width or height > screen_height:
+        width, height = min(width, screen_width), min(height, screen_height)
+        stacked += f",crop={width}:{height}:0:0"
+    if width < screen_width or height < screen_height:
+        stacked += f",pad={screen_width}:{screen_height}:color=black"
+    return stacked
+
+@functools.lru_cache(maxsize=4)
+def _parse_config(path: str, stamp: Tuple[int, int]) -> dict:
+    """Parsed JSON of a config file, keyed by its stat stamp so an unchanged file is never re-read"""
+    return json_loads(Path(path).read_bytes())
+
+class SmartPiCamBase(ABC):
+    """Config loading and console handling shared by every display profile"""
+
+    # Set by each profile
+    camera_class: type = None
+    display_config_class: type = None
+    banner = "SmartPiCam"
+
+    def __init__(self, config_path: str = "config/smartpicam.json"):
+        self.config_path = config_path
+        self.cameras: List = []
+        self.display_config = None
+        self.ffmpeg_process = None
+        self.running = False
+        self.cursor_hidden = False
+        self._config_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the loaded config
+        self._probe_cache: Dict[str, Tuple[float, bool]] = {}  # url -> (probed at, wall clock; ok)
+        self._probe_cache_lock = threading.Lock()  # Serialises saves from the main and monitor threads
+        self._dns_cache: Dict[str, Tuple[float, str]] = {}  # url -> (resolved at, url with the host's address)
+        self._process_cpus = os.sched_getaffinity(0)  # Taken before any thread pins itself
+        self._ffmpeg_cpus = self._process_cpus - HOUSEKEEPING_CPUS
+        self._cursor_blink_fd: Optional[int] = None  # Opened on first use, -1 if unavailable
+        self.setup_logging()
+
+    def setup_logging(self):
+        """Configure logging"""
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        self.logger = logging.getLogger("smartpicam")
+        self.logger.info(self.banner)
+
+    def _prioritise_ffmpeg(self, pid: int):
+        """Pin an ffmpeg process off the housekeeping core and raise its priority"""
+        try:
+            if self._ffmpeg_cpus:
+                os.sched_setaffinity(pid, self._ffmpeg_cpus)
+            os.setpriority(os.PRIO_PROCESS, pid, FFMPEG_NICENESS)
+        except PermissionError:
+            self.logger.debug("Not permitted to raise priority of ffmpeg pid %d", pid)
+        except OSError:
+            pass  # Process already exited
+
+    def _pin_to_housekeeping(self):
+        """Keep the calling thread on the housekeeping core; threads it starts inherit the pin"""
+        try:
+            os.sched_setaffinity(0, HOUSEKEEPING_CPUS)
+        except OSError:
+            pass
+
+    def _unpin_thread(self):
+        """Give the calling thread the process's full CPU set back, whichever thread started it"""
+        try:
+            os.sched_setaffinity(0, self._process_cpus)
+        except OSError:
+            pass
+
+    def _set_cursor_blink(self, enabled: bool):
+        """Toggle the fbcon cursor blink by writing sysfs directly"""
+        # Opened once and kept, so display restarts toggle it with a single write
+        if self._cursor_blink_fd is None:
+            try:
+                self._cursor_blink_fd = os.open(FBCON_CURSOR_BLINK, os.O_WRONLY | os.O_CLOEXEC)
+            except PermissionError:
+                self.logger.debug("No write access to %s - add the service user to the video group", FBCON_CURSOR_BLINK)
+                self._cursor_blink_fd = -1
+            except OSError:
+                self._cursor_blink_fd = -1  # No framebuffer console
+        if self._cursor_blink_fd < 0:
+            return
+        try:
+            os.pwrite(self._cursor_blink_fd, b'1' if enabled else b'0', 0)
+        except OSError as e:
+            self.logger.debug("Could not write %s: %s", FBCON_CURSOR_BLINK, e)
+
+    def _set_console_mode(self, graphics: bool):
+        """Switch the VT between text and graphics mode; graphics mode stops fbcon drawing the cursor"""
+        try:
+            fd = os.open(CONSOLE_TTY, os.O_RDWR | os.O_NOCTTY)
+        except OSError as e:
+            self.logger.debug("Cannot open %s for KDSETMODE: %s", CONSOLE_TTY, e)
+            return
+        try:
+            fcntl.ioctl(fd, KDSETMODE, KD_GRAPHICS if graphics else KD_TEXT)
+        except OSError as e:
+            self.logger.debug("KDSETMODE failed: %s", e)
+        finally:
+            os.close(fd)
+
+    def _hide_cursor(self):
+        """Hide the console cursor to prevent flickering"""
+        try:
+            os.write(1, HIDE_CURSOR)
+            # Stop the framebuffer console blinking or drawing a cursor over the grid
+            self._set_cursor_blink(False)
+            self._set_console_mode(graphics=True)
+            self.cursor_hidden = True
+            self.logger.info("Console cursor hidden")
+        except Exception as e:
+            self.logger.warning("Could not hide cursor: %s", e)
+
+    def _show_cursor(self):
+        """Show the console cursor again"""
+        try:
+            if self.cursor_hidden:
+                os.write(1, SHOW_CURSOR)
+                # Hand the console back in text mode
+                self._set_cursor_blink(True)
+                self._set_console_mode(graphics=False)
+                self.cursor_hidden = False
+                self.logger.info("Console cursor restored")
+        except Exception as e:
+            self.logger.warning("Could not restore cursor: %s", e)
+
+    def _load_probe_cache(self):
+        """Seed the probe cache with still-fresh results a previous run saved"""
+        try:
+            saved = json_loads(Path(PROBE_CACHE_PATH).read_bytes())
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        try:
+            for camera in self.cameras:
+                entry = saved.get(hashlib.sha256(camera.url.encode()).hexdigest())
+                if entry and now - entry[0] < PROBE_CACHE_TTL:
+                    self._probe_cache.setdefault(camera.url, (entry[0], bool(entry[1])))
+        except (AttributeError, TypeError, IndexError):
+            self.logger.debug("Ignoring malformed probe cache %s", PROBE_CACHE_PATH)
+
+    def _save_probe_cache(self):
+        """Write the probe cache atomically so the next run can skip fresh probes"""
+        tmp_path = PROBE_CACHE_PATH + ".tmp"
+        # Snapshot and write under one lock, so an older snapshot can never land after a newer one
+        with self._probe_cache_lock:
+            snapshot = dict(self._probe_cache)  # Another thread may record a probe while this one hashes
+            entries = {hashlib.sha256(url.encode()).hexdigest(): entry for url, entry in snapshot.items()}
+            try:
+                os.makedirs(os.path.dirname(PROBE_CACHE_PATH), exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, PROBE_CACHE_PATH)
+            except OSError as e:
+                self.logger.debug("Could not save probe cache: %s", e)
+
+    def _resolve_url(self, url: str) -> str:
+        """Swap an RTSP URL's hostname for its IPv4 address so ffmpeg restarts skip the DNS lookup"""
+        now = time.monotonic()
+        cached = self._dns_cache.get(url)
+        if cached and now - cached[0] < DNS_CACHE_TTL:
+            return cached[1]
+
+        try:
+            parts = urllib.parse.urlsplit(url)
+            host, port = parts.hostname, parts.port
+        except ValueError:
+            return url
+        if parts.scheme != "rtsp" or not host:
+            return url
+        try:
+            ipaddress.ip_address(host)
+            return url  # Already an address
+        except ValueError:
+            pass
+
+        try:
+            address = socket.getaddrinfo(host, port or 554, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+        except OSError as e:
+            self.logger.debug("Could not pre-resolve %s, leaving it to ffmpeg: %s", host, e)
+            return url
+
+        credentials = parts.netloc.rpartition("@")[0]
+        netloc = f"{credentials}@{address}" if credentials else address
+        if port:
+            netloc += f":{port}"
+        resolved = urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+        self._dns_cache[url] = (now, resolved)
+        return resolved
+
+    def _forget_resolution(self, url: str):
+        """Make the next command build resolve this camera's hostname afresh"""
+        self._dns_cache.pop(url, None)
+
+    def _stat_config(self) -> Tuple[int, int]:
+        """Identify the config file's current contents; the size catches a rewrite within one mtime tick"""
+        st = os.stat(self.config_path)
+        return st.st_mtime_ns, st.st_size
+    
+    def load_config(self) -> bool:
+        """Load configuration from JSON file, keeping the current one if the file is unchanged"""
+        try:
+            stamp = self._stat_config()
+            if stamp == self._config_stamp and self.cameras:
+                return True
+
+            config_data = _parse_config(self.config_path, stamp)
+
+            # Parse display config
+            display_fields = config_fields(self.display_config_class)
+            display_data = config_data.get("display", {})
+            self.display_config = self.display_config_class(**{k: v for k, v in display_data.items() if k in display_fields})
+
+            # Set logging level
+            numeric_level = getattr(logging, self.display_config.log_level.upper(), logging.INFO)
+            logging.getLogger().setLevel(numeric_level)
+
+            # Parse cameras
+            camera_fields = config_fields(self.camera_class)
+            cameras_data = config_data.get("cameras", [])
+            enabled_cameras = [
+                self.camera_class(**{k: v for k, v in cam_data.items() if k in camera_fields})
+                for cam_data in cameras_data if cam_data.get("enabled", True)
+            ]
+
+            if not enabled_cameras:
+                self.logger.error("No enabled cameras found in configuration")
+                return False
+
+            self.cameras = enabled_cameras
+            self.logger.info("Loaded configuration with %d enabled cameras", len(self.cameras))
+            self._load_probe_cache()
+
+            self._prepare_config()
+            self._config_stamp = stamp
+            return True
+
+        except Exception as e:
+            self.logger.error("Failed to load config: %s", e)
+            return False
+
+    def _prepare_config(self):
+        """Derive whatever the freshly loaded config fixes, such as prebuilt argv"""
+
+    @abstractmethod
+    def _build_ffmpeg_grid_command(self) -> List[str]:
+        """Build the ffmpeg command that drives the display"""
@@ -1,20 +1,108 @@
 #!/usr/bin/env python3
 
-import json
 import logging
 import subprocess
 import time
 import signal
 import sys
 import os
+import mmap
+import struct
 import shlex
-from pathlib import Path
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import fcntl
+import select
+import sched
+import urllib.parse
+from typing import List, Dict, Optional, Tuple, Deque
+from collections import deque
+from dataclasses import dataclass, field
 import threading
-import concurrent.futures
+import asyncio
+import functools
 
-@dataclass
+from smartpicam_core import SmartPiCamBase, DECODER_THREAD_ARGS, LOW_DELAY_INPUT_ARGS, PROBE_CACHE_TTL, xstack_filter
+
+# Named pipes feeding the compositor, one per camera slot
+FIFO_DIR = "/tmp/smartpicam"
+FILTER_SCRIPT_PATH = os.path.join(FIFO_DIR, "filter_complex.txt")
+SLOT_FRAME_RATE = 25
+COMPOSITOR_START_TIMEOUT = 2.0
+
+# A live slot whose producer is alive but has delivered no frame for this long is
+# treated as dropped (an RTSP server can hold the connection open and stop sending).
+# A fresh producer gets the extra grace for its RTSP handshake and first keyframe
+SLOT_STALL_TIMEOUT = 5.0
+SLOT_CONNECT_GRACE = 5.0
+
+# Longest shutdown waits for the monitor to finish a restart or retry it is part way through
+MONITOR_JOIN_TIMEOUT = 15.0
+
+# Skip ffmpeg's multi-second stream analysis; RTSP's SDP already names the codec
+FAST_START_INPUT_ARGS = ("-probesize", "32", "-analyzeduration", "0", "-reorder_queue_size", "0")
+
+# Input options shared by every RTSP open, built once rather than per command.
+# Interleaved TCP never reorders, so the demuxer's jitter allowance is halved to 500 ms
+RTSP_INPUT_ARGS = ("-rtsp_transport", "tcp", "-max_delay", "500000", *FAST_START_INPUT_ARGS)
+
+# h264_v4l2m2m buffer pools. A deep bitstream (output) queue takes an I-frame burst
+# without the demuxer blocking on the decoder. Decoded (capture) frames are full-size
+# CMA allocations per camera, so that pool stays small and only grows when
+# scale_v4l2m2m holds DMABUFs downstream and would otherwise starve the decoder
+V4L2M2M_OUTPUT_BUFFERS = 32
+V4L2M2M_CAPTURE_BUFFERS = 4
+V4L2M2M_CAPTURE_BUFFERS_ZERO_COPY = 8
+
+# Framebuffer ioctls (linux/fb.h)
+FBIOGET_VSCREENINFO = 0x4600
+FBIOPUT_VSCREENINFO = 0x4601
+FBIOGET_FSCREENINFO = 0x4602
+FBIOPAN_DISPLAY = 0x4606
+FBIO_WAITFORVSYNC = 0x40044620
+FB_VAR_SCREENINFO = struct.Struct("=40I")  # xres, yres, xres_virtual, yres_virtual, xoffset, yoffset, ...
+FB_FIX_SCREENINFO_HEAD = struct.Struct("@16sL4I3HI")  # id, smem_start, smem_len, type, type_aux, visual, *panstep, line_length
+
+# Unprivileged processes may grow a pipe up to this many bytes
+PIPE_MAX_SIZE_PATH = "/proc/sys/fs/pipe-max-size"
+
+# Compositor filter templates
+SETPTS_FILTER = "[{i}:v]setpts=PTS-STARTPTS[{label}]".format
+OVERLAY_FILTER = "{source}[{label}]overlay@cam{i}=x={x}:y={y}{sink}".format
+
+# RGB values for the placeholder colour names accepted in the config
+PLACEHOLDER_COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "gray": (128, 128, 128),
+    "grey": (128, 128, 128),
+    "darkgray": (169, 169, 169),
+    "darkgrey": (169, 169, 169),
+    "dimgray": (105, 105, 105),
+    "lightgray": (211, 211, 211),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+    "navy": (0, 0, 128),
+    "yellow": (255, 255, 0),
+    "orange": (255, 165, 0),
+    "purple": (128, 0, 128),
+    "cyan": (0, 255, 255),
+}
+
+@functools.lru_cache(maxsize=None)
+def _placeholder_input_args(use_image: bool, image: str, color: str, width: int, height: int) -> Tuple[str, ...]:
+    """Pre-split ffmpeg input arguments for a placeholder"""
+    if use_image:
+        # Use actual placeholder image with loop to make it continuous
+        return ("-loop", "1", "-i", image)
+    # Use solid color placeholder
+    return ("-f", "lavfi", "-i", f"color=c={color}:s={width}x{height}:r=25")
+
+def _yuv420p_frame_bytes(width: int, height: int) -> int:
+    """Size of one rawvideo yuv420p frame; odd dimensions round the chroma planes up"""
+    return width * height + 2 * ((width + 1) // 2) * ((height + 1) // 2)
+
+# Not frozen: load_config attaches each camera's derived slot label and argv
+@dataclass(slots=True)
 class Camera:
     name: str
     url: str
@@ -24,8 +112,13 @@ class Camera:
     width: int
     height: int
     enabled: bool = True
+    slot: int = field(default=-1, init=False)  # Compositor input index, set at load time
+    slot_label: str = field(default="", init=False)  # Compositor input label, set at load time
+    placeholder_args: List[str] = field(default_factory=list, init=False)  # Placeholder ffmpeg input
+    live_cmd: List[str] = field(default_factory=list, init=False)  # Slot producer argv, prebuilt at load time
+    placeholder_cmd: List[str] = field(default_factory=list, init=False)
 
-@dataclass 
+@dataclass(slots=True, frozen=True)
 class DisplayConfig:
     screen_width: int = 1920
     screen_height: int = 1080
@@ -43,486 +136,1185 @@ class DisplayConfig:
     placeholder_bg_color: str = "darkgray"
     camera_retry_interval: int = 30
     enable_camera_retry: bool = True
+    # Runtime layout control via the ffmpeg zmq filter (needs libzmq in ffmpeg)
+    zmq_control: bool = False
+    zmq_bind_address: str = "tcp://127.0.0.1:5555"
+    # Hardware H.264 decode for live streams: "v4l2m2m", "drm" or "none"
+    hw_decoder: str = "none"
+    # Scale live v4l2m2m-decoded streams on the ISP (scale_v4l2m2m; Raspberry Pi ffmpeg builds on Pi 4)
+    hw_scaler: bool = False
+    # Compositor sink: "fbdev" (/dev/fb0, RGB565) or "drm" (page-flipped KMS via SDL2)
+    output: str = "fbdev"
+    # fbdev only: composite into the off-screen half of a double-height framebuffer and
+    # pan to it at vsync, so a frame is never seen half written (needs fbdev overalloc)
+    fb_double_buffer: bool = False
 
-class ImprovedSmartPiCam:
+class FrameBuffer:
+    """Preallocated triple buffer between a slot producer and its pipe writer"""
+    
+    def __init__(self, frame_bytes: int):
+        # The producer fills `back`, the writer drains `front` and `ready`
+        # holds the newest whole frame. An unclaimed ready frame is simply
+        # overwritten, so latency through a slot is capped at one frame and
+        # a stalled compositor drops frames instead of queueing them
+        self.back, self.ready, self.front = (memoryview(bytearray(frame_bytes)) for _ in range(3))
+        self.fresh = False
+        self.cv = threading.Condition()
+        self.closed = False
+        self.last_frame = time.monotonic()  # When the producer last delivered a whole frame
+    
+    def publish(self):
+        """Hand the filled back buffer over as the newest frame"""
+        with self.cv:
+            self.back, self.ready = self.ready, self.back
+            self.fresh = True
+            self.last_frame = time.monotonic()
+            self.cv.notify()
+    
+    def get(self) -> Optional[memoryview]:
+        """Wait for the next frame; None once the buffer is closed"""
+        with self.cv:
+            self.cv.wait_for(lambda: self.fresh or self.closed)
+            if self.closed:
+                return None
+            self.front, self.ready = self.ready, self.front
+            self.fresh = False
+            return self.front
+    
+    def close(self):
+        """Wake the writer and make it stop"""
+        with self.cv:
+            self.closed = True
+            self.cv.notify_all()
+    
+    def reopen(self):
+        """Accept a new writer after close(), dropping any frame the old one left"""
+        with self.cv:
+            self.closed = False
+            self.fresh = False
+
+class PannedFramebuffer:
+    """Double-buffered /dev/fb0: frames land in the hidden half, then the display pans to it"""
+    
+    def __init__(self, device: str, width: int, height: int, cpus: Optional[set] = None):
+        self.cpus = cpus  # CPU set for the flip thread, which may be started from a pinned thread
+        self.fd = os.open(device, os.O_RDWR | os.O_CLOEXEC)
+        try:
+            var = bytearray(FB_VAR_SCREENINFO.size)
+            fcntl.ioctl(self.fd, FBIOGET_VSCREENINFO, var)
+            self._original_var = bytes(var)
+            fields = list(FB_VAR_SCREENINFO.unpack(var))
+            if (fields[0], fields[1], fields[6]) != (width, height, 16):
+                raise OSError(f"framebuffer is {fields[0]}x{fields[1]}@{fields[6]}bpp, not {width}x{height}@16bpp")
+            
+            # Ask for a second screen below the visible one
+            fields[3], fields[4], fields[5] = 2 * height, 0, 0
+            fcntl.ioctl(self.fd, FBIOPUT_VSCREENINFO, FB_VAR_SCREENINFO.pack(*fields))
+            fcntl.ioctl(self.fd, FBIOGET_VSCREENINFO, var)
+            self._var = list(FB_VAR_SCREENINFO.unpack(var))
+            if self._var[3] < 2 * height:
+                raise OSError("framebuffer has no room for a second screen")
+            
+            fix = bytearray(128)  # Larger than fb_fix_screeninfo on any ABI
+            fcntl.ioctl(self.fd, FBIOGET_FSCREENINFO, fix)
+            line_length = FB_FIX_SCREENINFO_HEAD.unpack_from(fix)[-1]
+            if line_length != width * 2:
+                raise OSError(f"framebuffer rows are padded to {line_length} bytes")
+            
+            self.frame_bytes = line_length * height
+            self.map = mmap.mmap(self.fd, 2 * self.frame_bytes, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except OSError:
+            self.close()
+            raise
+        self.height = height
+        self.visible = 0
+        self.flipper: Optional[threading.Thread] = None
+    
+    def show(self, frame: bytes):
+        """Flip a single pre-rendered frame onto the display"""
+        if self.flipper:
+            self.flipper.join()  # The old compositor's last frame must land first
+        back = 1 - self.visible
+        self.map[back * self.frame_bytes:back * self.frame_bytes + len(frame)] = frame
+        self._pan(back)
+    
+    def start(self, stream):
+        """Flip frames from a new compositor, once the previous one's frames have stopped"""
+        if self.flipper:
+            self.flipper.join()
+        self.flipper = threading.Thread(target=self.pump, args=(stream,), daemon=True, name="fb-flip")
+        self.flipper.start()
+    
+    def pump(self, stream):
+        """Read whole rawvideo frames into the hidden half and flip to each; returns at EOF"""
+        if self.cpus:
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except OSError:
+                pass
+        frames = memoryview(self.map)
+        while True:
+            back = 1 - self.visible
+            view = frames[back * self.frame_bytes:(back + 1) * self.frame_bytes]
+            filled = 0
+            while filled < self.frame_bytes:
+                count = stream.readinto(view[filled:])
+                if not count:
+                    return  # Compositor exited; the visible frame stays up
+                filled += count
+            self._pan(back)
+    
+    def _pan(self, screen: int):
+        """Show a screen, then wait for the vblank so the old one is off the display before it is rewritten"""
+        self._var[5] = screen * self.height
+        fcntl.ioctl(self.fd, FBIOPAN_DISPLAY, FB_VAR_SCREENINFO.pack(*self._var))
+        self.visible = screen
+        try:
+            fcntl.ioctl(self.fd, FBIO_WAITFORVSYNC, struct.pack("I", 0))
+        except OSError:
+            pass  # Not every fbdev driver can wait for vsync; the pan still applies
+    
+    def close(self):
+        """Restore the original framebuffer geometry and release it"""
+        if getattr(self, "flipper", None):
+            self.flipper.join()  # Returns once the compositor's stdout hits EOF
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        if self.fd >= 0:
+            try:
+                fcntl.ioctl(self.fd, FBIOPUT_VSCREENINFO, self._original_var)
+            except (AttributeError, OSError):
+                pass
+            os.close(self.fd)
+            self.fd = -1
+
+class ImprovedSmartPiCam(SmartPiCamBase):
+    camera_class = Camera
+    display_config_class = DisplayConfig
+    banner = "SmartPiCam v2.3 - Fixed placeholders and display issues"
+    
     def __init__(self, config_path: str = "config/smartpicam.json"):
-        self.config_path = config_path
+        super().__init__(config_path)
         self.cameras: List[Camera] = []
-        self.working_cameras: List[Camera] = []
-        self.failed_cameras: List[Camera] = []
+        # Keyed by camera name for O(1) membership; updated under _slot_lock
+        self.working_cameras: Dict[str, Camera] = {}
+        self.failed_cameras: Dict[str, Camera] = {}
         self.display_config: DisplayConfig = None
         self.ffmpeg_process: Optional[subprocess.Popen] = None
-        self.running = False
-        self.cursor_hidden = False
-        self.camera_status_changed = threading.Event()
+        self._shutdown_evt = threading.Event()
+        # Self-pipe waking the monitor: a signal handler may write to it without taking any lock
+        self._wake_r, self._wake_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        self._scheduler = sched.scheduler(time.monotonic)  # Periodic jobs, run by the monitor thread
+        self._display_lock = threading.Lock()  # Makes display start, restart and teardown mutually exclusive
+        self.slot_processes: Dict[int, subprocess.Popen] = {}
+        self._fifo_keepalive: Dict[int, int] = {}
+        self.slot_buffers: Dict[int, FrameBuffer] = {}
+        self.slot_writers: Dict[int, threading.Thread] = {}
+        self.slot_readers: Dict[int, threading.Thread] = {}
+        self._slot_lock = threading.RLock()
         self.placeholder_available = False
-        self.setup_logging()
+        self._placeholder_frame: Optional[bytearray] = None
+        self._cached_filter_string: Optional[Tuple[tuple, str]] = None
+        self._written_filter_script: Optional[str] = None
+        self._grid_cmd: List[str] = []
+        self._panned_fb: Optional[PannedFramebuffer] = None
+        self._ffmpeg_stderr_tail: Deque[bytes] = deque(maxlen=20)
         
     def setup_logging(self):
         """Configure logging"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger("smartpicam")
-        self.logger.info("SmartPiCam v2.3 - Fixed placeholders and display issues")
+        super().setup_logging()
+        # Never let a bad log record interrupt the display in production
+        logging.raiseExceptions = False
         
-    def _hide_cursor(self):
-        """Hide the console cursor to prevent flickering"""
-        try:
-            sys.stdout.write('\033[?25l')
-            sys.stdout.flush()
-            subprocess.run(['sudo', 'sh', '-c', 'echo 0 > /sys/class/graphics/fbcon/cursor_blink'], 
-                         capture_output=True, timeout=5)
-            subprocess.run(['setterm', '-cursor', 'off'], 
-                         capture_output=True, timeout=5)
-            self.cursor_hidden = True
-            self.logger.info("Console cursor hidden")
-        except Exception as e:
-            self.logger.warning(f"Could not hide cursor: {e}")
     
-    def _show_cursor(self):
-        """Show the console cursor again"""
-        try:
-            if self.cursor_hidden:
-                sys.stdout.write('\033[?25h')
-                sys.stdout.flush()
-                subprocess.run(['sudo', 'sh', '-c', 'echo 1 > /sys/class/graphics/fbcon/cursor_blink'], 
-                             capture_output=True, timeout=5)
-                subprocess.run(['setterm', '-cursor', 'on'], 
-                             capture_output=True, timeout=5)
-                self.cursor_hidden = False
-                self.logger.info("Console cursor restored")
-        except Exception as e:
-            self.logger.warning(f"Could not restore cursor: {e}")
+    def _prepare_config(self):
+        for i, camera in enumerate(self.cameras):
+            camera.slot = i
+            camera.slot_label = f"v{i}"
+        
+        # Check placeholder image
+        if self.display_config.show_placeholders:
+            if os.path.exists(self.display_config.placeholder_image):
+                self.placeholder_available = True
+                self.logger.info("✓ Placeholder image found: %s", self.display_config.placeholder_image)
+            else:
+                self.placeholder_available = False
+                self.logger.info("ℹ Placeholder image not found: %s", self.display_config.placeholder_image)
+                self.logger.info("Will use solid color placeholders instead")
+        
+        # Placeholder inputs and every argv are fixed by the config, so build them once;
+        # restarts and slot swaps only pick between prebuilt lists
+        for i, camera in enumerate(self.cameras):
+            camera.placeholder_args = self._create_placeholder_for_camera(camera)
+            camera.live_cmd = self._build_slot_command(i, camera, live=True)
+            camera.placeholder_cmd = self._build_slot_command(i, camera, live=False)
+        self._open_panned_framebuffer()
+        self._grid_cmd = self._build_ffmpeg_grid_command()
         
-    def load_config(self) -> bool:
-        """Load configuration from JSON file"""
+        # Pre-render the bootstrap placeholder grid for the framebuffer
+        self._placeholder_frame = self._build_placeholder_frame()
+        
+        if self.display_config.enable_camera_retry:
+            self.logger.info("Auto-recovery enabled: checking failed cameras every %ss",
+                             self.display_config.camera_retry_interval)
+    
+    def _open_panned_framebuffer(self):
+        """Set up the double-buffered framebuffer if configured, falling back to ffmpeg's fbdev output"""
+        if self._panned_fb:
+            self._panned_fb.close()
+            self._panned_fb = None
+        config = self.display_config
+        if not config.fb_double_buffer or config.output != "fbdev":
+            return
         try:
-            with open(self.config_path, 'r') as f:
-                config_data = json.load(f)
-                
-            # Parse display config
-            display_data = config_data.get("display", {})
-            self.display_config = DisplayConfig(**display_data)
-            
-            # Set logging level
-            numeric_level = getattr(logging, self.display_config.log_level.upper(), logging.INFO)
-            logging.getLogger().setLevel(numeric_level)
-            
-            # Parse cameras
-            cameras_data = config_data.get("cameras", [])
-            enabled_cameras = [Camera(**cam_data) for cam_data in cameras_data if cam_data.get("enabled", True)]
-            
-            if not enabled_cameras:
-                self.logger.error("No enabled cameras found in configuration")
-                return False
-                
-            self.cameras = enabled_cameras
-            self.logger.info(f"Loaded configuration with {len(self.cameras)} enabled cameras")
-            
-            # Check placeholder image
-            if self.display_config.show_placeholders:
-                if os.path.exists(self.display_config.placeholder_image):
-                    self.placeholder_available = True
-                    self.logger.info(f"✓ Placeholder image found: {self.display_config.placeholder_image}")
-                else:
-                    self.placeholder_available = False
-                    self.logger.info(f"ℹ Placeholder image not found: {self.display_config.placeholder_image}")
-                    self.logger.info("Will use solid color placeholders instead")
-            
-            if self.display_config.enable_camera_retry:
-                self.logger.info(f"Auto-recovery enabled: checking failed cameras every {self.display_config.camera_retry_interval}s")
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to load config: {e}")
-            return False
+            self._panned_fb = PannedFramebuffer("/dev/fb0", config.screen_width, config.screen_height,
+                                                cpus=self._process_cpus)
+            self.logger.info("✓ Framebuffer double buffering enabled")
+        except OSError as e:
+            self.logger.warning("Framebuffer double buffering unavailable (%s) - writing frames in place", e)
     
-    def _create_placeholder_for_camera(self, camera: Camera, reason: str = "loading") -> str:
+    def _create_placeholder_for_camera(self, camera: Camera, reason: str = "loading") -> List[str]:
         """Create a placeholder input for a camera"""
-        if self.display_config.show_placeholders and self.placeholder_available:
-            # Use actual placeholder image with loop to make it continuous
-            return f"-loop 1 -i {self.display_config.placeholder_image}"
+        config = self.display_config
+        return list(_placeholder_input_args(
+            config.show_placeholders and self.placeholder_available,
+            config.placeholder_image, config.placeholder_bg_color, camera.width, camera.height
+        ))
+    
+    def _placeholder_pixel(self) -> bytes:
+        """Pack the configured placeholder colour as a little-endian RGB565 pixel"""
+        color = self.display_config.placeholder_bg_color.lower()
+        if color.startswith("#") or color.startswith("0x"):
+            value = int(color.lstrip("#")[-6:], 16)
+            r, g, b = (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
         else:
-            # Use solid color placeholder
-            color = self.display_config.placeholder_bg_color
-            return f"-f lavfi -i color=c={color}:s={camera.width}x{camera.height}:r=25"
+            r, g, b = PLACEHOLDER_COLORS.get(color, PLACEHOLDER_COLORS["darkgray"])
+        return struct.pack("<H", ((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3))
+    
+    def _build_placeholder_frame(self) -> bytearray:
+        """Pre-render placeholder rectangles for every camera into an RGB565 screen image"""
+        screen_w = self.display_config.screen_width
+        screen_h = self.display_config.screen_height
+        frame = bytearray(screen_w * screen_h * 2)  # Zeroed = black background
+        pixel = self._placeholder_pixel()
+        
+        for camera in self.cameras:
+            # Clip each camera rectangle to the screen
+            x0 = min(max(camera.x, 0), screen_w)
+            x1 = min(max(camera.x + camera.width, x0), screen_w)
+            y0 = min(max(camera.y, 0), screen_h)
+            y1 = min(max(camera.y + camera.height, y0), screen_h)
+            
+            row = pixel * (x1 - x0)
+            for y in range(y0, y1):
+                offset = (y * screen_w + x0) * 2
+                frame[offset:offset + len(row)] = row
+        
+        return frame
     
     def _show_initial_placeholders(self) -> bool:
         """Show placeholders for all cameras immediately while testing streams"""
         self.logger.info("Showing initial placeholders for all camera positions...")
         
-        # Simple command to show placeholders quickly
-        cmd = ["ffmpeg", "-y", "-loglevel", "error"]
-        
-        # Add placeholder inputs for all cameras
-        for camera in self.cameras:
-            placeholder_input = self._create_placeholder_for_camera(camera, "loading")
-            cmd.extend(placeholder_input.split())
+        if self._placeholder_frame is None:
+            self._placeholder_frame = self._build_placeholder_frame()
         
-        # Build filter chain
-        filter_parts = []
+        try:
+            if self._panned_fb:
+                self._panned_fb.show(self._placeholder_frame)
+                self.logger.info("✓ Initial placeholders displayed")
+                return True
+            
+            if not self._blit_placeholder_frame():
+                return False
+            self.logger.info("✓ Initial placeholders displayed")
+            return True
+        except Exception as e:
+            self.logger.warning("Error showing initial placeholders: %s", e)
+            return False
+    
+    def _blit_placeholder_frame(self) -> bool:
+        """Copy the pre-rendered frame into the visible framebuffer row by row, honouring its stride"""
+        width, height = self.display_config.screen_width, self.display_config.screen_height
+        fd = os.open("/dev/fb0", os.O_RDWR | os.O_CLOEXEC)
+        try:
+            var = FB_VAR_SCREENINFO.unpack(fcntl.ioctl(fd, FBIOGET_VSCREENINFO, bytes(FB_VAR_SCREENINFO.size)))
+            if (var[0], var[1], var[6]) != (width, height, 16):
+                # The frame is RGB565 at the configured size; leave a different mode to ffmpeg's fbdev output
+                self.logger.info("Framebuffer is %dx%d@%dbpp, not %dx%d@16bpp - skipping the placeholder pre-blit",
+                                 var[0], var[1], var[6], width, height)
+                return False
+            
+            fix = FB_FIX_SCREENINFO_HEAD.unpack_from(fcntl.ioctl(fd, FBIOGET_FSCREENINFO, bytes(128)))
+            smem_len, line_length = fix[2], fix[-1]
+            row_bytes = width * 2
+            start = var[5] * line_length + var[4] * 2  # Top-left of the visible (possibly panned) area
+            length = start + (height - 1) * line_length + row_bytes
+            if line_length < row_bytes or length > smem_len:
+                self.logger.info("Framebuffer layout does not fit the screen - skipping the placeholder pre-blit")
+                return False
+            
+            frame = memoryview(self._placeholder_frame)
+            with mmap.mmap(fd, length, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE) as fb:
+                for y in range(height):
+                    offset = start + y * line_length
+                    fb[offset:offset + row_bytes] = frame[y * row_bytes:(y + 1) * row_bytes]
+            return True
+        finally:
+            os.close(fd)
+    
+    def _slot_fifo_path(self, index: int) -> str:
+        """Path of the named pipe feeding compositor input `index`"""
+        return os.path.join(FIFO_DIR, f"cam{index}")
+    
+    def _slot_log_path(self, index: int) -> str:
+        """Path of the file collecting slot `index`'s producer errors"""
+        return os.path.join(FIFO_DIR, f"cam{index}.log")
+    
+    def _slot_log_tail(self, index: int, limit: int = 1024) -> str:
+        """Last few errors the slot's producer logged before it exited"""
+        try:
+            with open(self._slot_log_path(index), 'rb') as f:
+                f.seek(max(0, os.fstat(f.fileno()).st_size - limit))
+                return f.read().decode(errors="replace").strip()
+        except OSError:
+            return ""
+    
+    def _grow_pipe(self, fd: int, frame_bytes: int):
+        """Size a pipe to hold a whole frame so it crosses in one write instead of 64 KiB chunks"""
+        try:
+            with open(PIPE_MAX_SIZE_PATH) as f:
+                limit = int(f.read())
+        except (OSError, ValueError):
+            limit = 1024 * 1024
+        try:
+            fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, min(frame_bytes, limit))
+        except OSError as e:
+            self.logger.debug("Could not grow pipe to %d bytes: %s", frame_bytes, e)
+    
+    def _create_slot_fifos(self):
+        """Create one named pipe per camera slot and hold each one open"""
+        os.makedirs(FIFO_DIR, exist_ok=True)
         
-        # Scale each placeholder to its camera size
-        for i, camera in enumerate(self.cameras):
-            scale_filter = f"[{i}:v]scale={camera.width}:{camera.height}[v{i}]"
-            filter_parts.append(scale_filter)
+        for i in range(len(self.cameras)):
+            path = self._slot_fifo_path(i)
+            if os.path.exists(path):
+                os.unlink(path)
+            os.mkfifo(path)
+            
+            # Keep a read/write handle open so the compositor never sees EOF
+            # while a slot's producer is being swapped
+            self._fifo_keepalive[i] = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            
+            # One writer per slot outlives producer swaps and only ever
+            # writes whole frames into the pipe
+            camera = self.cameras[i]
+            frame_bytes = _yuv420p_frame_bytes(camera.width, camera.height)
+            self._grow_pipe(self._fifo_keepalive[i], frame_bytes)
+            self.slot_buffers[i] = FrameBuffer(frame_bytes)
+            self._start_slot_writer(i)
+    
+    def _start_slot_writer(self, index: int):
+        """Start the thread feeding a slot's frames into its named pipe"""
+        writer = threading.Thread(
+            target=self._write_slot, args=(index, self.slot_buffers[index]),
+            daemon=True, name=f"slot-writer-{index}"
+        )
+        writer.start()
+        self.slot_writers[index] = writer
+    
+    def _empty_fifo(self, fd: int):
+        """Discard whatever is queued in a non-blocking pipe"""
+        try:
+            while os.read(fd, 1024 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+    
+    def _resync_slot_pipes(self):
+        """Empty every slot pipe on a frame boundary so a new compositor starts on whole frames"""
+        with self._slot_lock:
+            for i, buffer in self.slot_buffers.items():
+                fd = self._fifo_keepalive[i]
+                writer = self.slot_writers[i]
+                buffer.close()
+                # The writer may be blocked mid-frame on the full pipe; drain until it finishes
+                while writer.is_alive():
+                    self._empty_fifo(fd)
+                    writer.join(timeout=0.05)
+                self._empty_fifo(fd)
+                buffer.reopen()
+                self._start_slot_writer(i)
+    
+    def _remove_slot_fifos(self):
+        """Close and remove the per-slot named pipes"""
+        for buffer in self.slot_buffers.values():
+            buffer.close()
+        for writer in self.slot_writers.values():
+            writer.join(timeout=1)
+        self.slot_buffers.clear()
+        self.slot_writers.clear()
         
-        # Create black background
-        filter_parts.append(f"color=black:{self.display_config.screen_width}x{self.display_config.screen_height}[bg]")
+        for i, fd in list(self._fifo_keepalive.items()):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            try:
+                os.unlink(self._slot_fifo_path(i))
+            except OSError:
+                pass
+        self._fifo_keepalive.clear()
+    
+    def _write_slot(self, index: int, buffer: FrameBuffer):
+        """Feed whole frames from a slot's buffer into its named pipe"""
+        # Started from the monitor after a swap or resync, this would otherwise inherit its housekeeping pin
+        self._unpin_thread()
+        try:
+            fd = os.open(self._slot_fifo_path(index), os.O_WRONLY)
+        except OSError as e:
+            self.logger.error("Cannot open pipe for slot %d: %s", index, e)
+            return
         
-        # Overlay each placeholder at its position
-        overlay_chain = "[bg]"
-        for i, camera in enumerate(self.cameras):
-            if i == len(self.cameras) - 1:
-                # Last overlay
-                overlay = f"{overlay_chain}[v{i}]overlay={camera.x}:{camera.y},format=rgb565le[out]"
-            else:
-                overlay = f"{overlay_chain}[v{i}]overlay={camera.x}:{camera.y}[bg{i}]"
-                overlay_chain = f"[bg{i}]"
-            filter_parts.append(overlay)
+        try:
+            while True:
+                view = buffer.get()
+                if view is None:
+                    break
+                while view:
+                    view = view[os.write(fd, view):]
+        except OSError:
+            pass  # Compositor went away
+        finally:
+            os.close(fd)
+    
+    def _pump_slot(self, process: subprocess.Popen, buffer: FrameBuffer):
+        """Read whole frames from a producer straight into its slot's frame buffer"""
+        self._unpin_thread()  # Per-frame copies stay off the housekeeping core's pin
+        while True:
+            view = buffer.back
+            filled = 0
+            while filled < len(view):
+                count = process.stdout.readinto(view[filled:])
+                if not count:
+                    return  # Producer exited; a trailing partial frame is dropped
+                filled += count
+            buffer.publish()
+    
+    def _hw_decoder_args(self) -> List[str]:
+        """Input options that move H.264 decode onto the Pi's video block"""
+        decoder = self.display_config.hw_decoder
+        if decoder == "v4l2m2m":
+            # Stateful V4L2 M2M decoder (Pi 4)
+            zero_copy = self.display_config.hw_scaler
+            args = [
+                "-c:v", "h264_v4l2m2m",
+                "-num_output_buffers", str(V4L2M2M_OUTPUT_BUFFERS),
+                "-num_capture_buffers", str(V4L2M2M_CAPTURE_BUFFERS_ZERO_COPY if zero_copy else V4L2M2M_CAPTURE_BUFFERS),
+            ]
+            if zero_copy:
+                args.extend(["-pix_fmt", "drm_prime"])  # Hand DMABUFs straight to scale_v4l2m2m
+            return args
+        if decoder == "drm":
+            # DRM hwaccel; frames are downloaded again for the producer's scale step
+            return ["-hwaccel", "drm", "-hwaccel_device", "/dev/dri/renderD128"]
+        return []
+    
+    def _uses_hw_scaler(self, camera: Camera) -> bool:
+        """Whether a live camera is scaled on the ISP rather than in software"""
+        config = self.display_config
+        return config.hw_scaler and config.hw_decoder == "v4l2m2m" and camera.url.startswith("rtsp://")
+    
+    def _build_slot_command(self, index: int, camera: Camera, live: bool) -> List[str]:
+        """Build the producer command that emits one slot's raw frames on stdout"""
+        cmd = ["ffmpeg", "-y", "-loglevel", "error"]
         
-        filter_string = ";".join(filter_parts)
+        if live:
+            if camera.url.startswith("rtsp://"):
+                cmd.extend(self._hw_decoder_args())
+            cmd.extend([
+                "-timeout", "5000000",  # Drop a dead connection after 5 s; the retry loop reconnects
+                *RTSP_INPUT_ARGS,
+                *LOW_DELAY_INPUT_ARGS,
+                *DECODER_THREAD_ARGS,
+                "-i", self._resolve_url(camera.url)
+            ])
+        else:
+            # Pace the looped placeholder at real time like a live camera
+            cmd.append("-re")
+            cmd.extend(camera.placeholder_args)
         
+        # Scale to the tile size here so the compositor only has to overlay
+        if live and self._uses_hw_scaler(camera):
+            # Decoded frames stay in DMABUFs through the ISP; only the tile-sized result is downloaded
+            scale = f"scale_v4l2m2m={camera.width}:{camera.height},hwdownload,format=yuv420p"
+        elif live:
+            scale = f"scale={camera.width}:{camera.height}:flags=fast_bilinear"
+        else:
+            # The looped placeholder image is rescaled every frame; nearest-neighbour is cheapest
+            scale = f"scale={camera.width}:{camera.height}:flags=neighbor"
         cmd.extend([
-            "-filter_complex", filter_string,
-            "-map", "[out]",
-            "-f", "fbdev", "/dev/fb0",
-            "-pix_fmt", "rgb565le",
-            "-t", "2"  # Show for 2 seconds
+            "-an",
+            "-vf", f"{scale},fps={SLOT_FRAME_RATE}",
+            "-pix_fmt", "yuv420p",
+            "-f", "rawvideo",
+            "pipe:1"
         ])
         
+        return cmd
+    
+    def _start_slot(self, index: int, camera: Camera) -> bool:
+        """Start the producer for a slot - live stream if working, placeholder otherwise"""
+        live = camera.name in self.working_cameras
+        cmd = camera.live_cmd if live else camera.placeholder_cmd
+        
         try:
             env = os.environ.copy()
             env.pop('DISPLAY', None)
             
-            result = subprocess.run(cmd, capture_output=True, timeout=5, env=env)
-            if result.returncode == 0:
-                self.logger.info("✓ Initial placeholders displayed")
-                return True
-            else:
-                self.logger.warning(f"Could not show initial placeholders: {result.stderr.decode() if result.stderr else 'Unknown error'}")
-                return False
-        except subprocess.TimeoutExpired:
-            self.logger.warning("Initial placeholder display timed out")
-            return False
+            # Producers log at error level only, so a per-start file stays tiny
+            # and nothing has to drain it while the slot runs
+            with open(self._slot_log_path(index), 'wb') as log:
+                process = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=log,
+                    start_new_session=True,  # Off the terminal's Ctrl-C; keeps the vfork/posix_spawn path
+                    env=env
+                )
+            self.slot_processes[index] = process
+            self.slot_buffers[index].last_frame = time.monotonic() + SLOT_CONNECT_GRACE
+            self._prioritise_ffmpeg(process.pid)
+            self._grow_pipe(process.stdout.fileno(), len(self.slot_buffers[index].back))
+            
+            reader = threading.Thread(
+                target=self._pump_slot, args=(process, self.slot_buffers[index]),
+                daemon=True, name=f"slot-reader-{index}"
+            )
+            reader.start()
+            self.slot_readers[index] = reader
+            self.logger.debug("Slot %d: %s for %s", index, "live stream" if live else "placeholder", camera.name)
+            return True
         except Exception as e:
-            self.logger.warning(f"Error showing initial placeholders: {e}")
+            self.logger.error("Failed to start slot %d for %s: %s", index, camera.name, e)
             return False
     
+    def _stop_slot(self, index: int):
+        """Stop the producer currently feeding a slot"""
+        process = self.slot_processes.pop(index, None)
+        if process:
+            try:
+                process.terminate()
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        
+        # The old reader must be gone before a new one shares the back buffer
+        reader = self.slot_readers.pop(index, None)
+        if reader:
+            reader.join(timeout=1)
+    
+    def _swap_slot(self, index: int, camera: Camera):
+        """Replace a slot's producer in place; the compositor keeps running"""
+        with self._slot_lock:
+            self._stop_slot(index)
+            self._start_slot(index, camera)
+    
+    def _build_filter_string(self) -> str:
+        """Build the compositor filter graph, reusing the cached one while the layout is unchanged"""
+        config = self.display_config
+        cache_key = (
+            config.screen_width, config.screen_height, config.output,
+            config.zmq_control, config.zmq_bind_address,
+            tuple((camera.x, camera.y, camera.width, camera.height) for camera in self.cameras)
+        )
+        if self._cached_filter_string and self._cached_filter_string[0] == cache_key:
+            return self._cached_filter_string[1]
+        
+        count = len(self.cameras)
+        pix_fmt = "yuv420p" if config.output == "drm" else "rgb565le"
+        filter_parts: List[Optional[str]] = [None] * (2 * count + 1)
+        
+        # Rebase each slot's wallclock timestamps to the start of the graph
+        for i, camera in enumerate(self.cameras):
+            filter_parts[i] = SETPTS_FILTER(i=i, label=camera.slot_label)
+        
+        if count > 1 and not config.zmq_control:
+            # A fixed layout composites in one xstack pass rather than an overlay
+            # per slot over a generated background (xstack needs two inputs or more)
+            labels = "".join(f"[{camera.slot_label}]" for camera in self.cameras)
+            stacked = xstack_filter(self.cameras, config.screen_width, config.screen_height)
+            filter_string = ";".join([*filter_parts[:count], f"{labels}{stacked},format={pix_fmt}[out]"])
+            self._cached_filter_string = (cache_key, filter_string)
+            return filter_string
+        
+        # Create black background, optionally controllable over ZeroMQ
+        background = f"color=black:s={config.screen_width}x{config.screen_height}:r={SLOT_FRAME_RATE}"
+        if config.zmq_control:
+            bind_address = config.zmq_bind_address.replace(":", "\\:")
+            background += f",zmq=bind_address={bind_address}"
+        # Keep the overlay chain in 12-bit yuv420p; RGB565 is produced once at the sink
+        filter_parts[count] = f"{background},format=yuv420p[bg]"
+        
+        # Overlay each slot at its position; named so zmq can move them
+        for i, camera in enumerate(self.cameras):
+            source = "[bg]" if i == 0 else f"[bg{i - 1}]"
+            sink = f",format={pix_fmt}[out]" if i == count - 1 else f"[bg{i}]"
+            filter_parts[count + 1 + i] = OVERLAY_FILTER(
+                source=source, label=camera.slot_label, i=i, x=camera.x, y=camera.y, sink=sink
+            )
+        
+        filter_string = ";".join(filter_parts)
+        self._cached_filter_string = (cache_key, filter_string)
+        return filter_string
+    
+    def _write_filter_script(self) -> str:
+        """Persist the filter graph for -filter_complex_script, rewriting it only when it changes"""
+        filter_string = self._build_filter_string()
+        if self._written_filter_script != filter_string or not os.path.exists(FILTER_SCRIPT_PATH):
+            os.makedirs(FIFO_DIR, exist_ok=True)
+            tmp_path = f"{FILTER_SCRIPT_PATH}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(filter_string)
+            os.replace(tmp_path, FILTER_SCRIPT_PATH)  # A restart never sees a half-written graph
+            self._written_filter_script = filter_string
+        return FILTER_SCRIPT_PATH
+    
     def _build_ffmpeg_grid_command(self) -> List[str]:
-        """Build FFmpeg command for grid layout with placeholders for failed cameras"""
+        """Build the long-running compositor command that overlays every slot's pipe"""
         if not self.cameras:
             return []
         
-        cmd = ["ffmpeg", "-y", "-loglevel", "warning"]
+        # -progress on stderr gives start_display an early "frame=" to wait for
+        # -progress reports frames as key=value lines; -nostats drops the human stats line,
+        # which would otherwise crowd real errors out of the stderr tail
+        cmd = ["ffmpeg", "-y", "-loglevel", "warning", "-nostats", "-progress", "pipe:2", "-filter_complex_threads", "2"]
         
-        # Add timeout and thread settings to prevent hangs
-        cmd.extend(["-thread_queue_size", "512"])
+        # One raw video pipe per camera slot, already scaled to the tile size
+        for i, camera in enumerate(self.cameras):
+            cmd.extend([
+                "-thread_queue_size", "64",
+                "-f", "rawvideo",
+                "-pix_fmt", "yuv420p",
+                "-video_size", f"{camera.width}x{camera.height}",
+                "-framerate", str(SLOT_FRAME_RATE),
+                "-use_wallclock_as_timestamps", "1",  # Keep pts monotonic across producer swaps
+                "-i", self._slot_fifo_path(i)
+            ])
         
-        # Build input list with both working cameras and placeholders
-        input_sources = []
+        # The graph grows with every camera; keep it out of argv
+        cmd.extend(["-filter_complex_script", FILTER_SCRIPT_PATH, "-map", "[out]"])
         
-        for camera in self.cameras:
-            input_index = len(input_sources)
-            
-            if camera in self.working_cameras:
-                # Working camera with timeout
-                cmd.extend([
-                    "-timeout", "10000000",  # 10 second timeout
-                    "-rtsp_transport", "tcp",  # Use TCP for reliability
-                    "-i", camera.url
-                ])
-                input_sources.append(("camera", camera))
-                self.logger.debug(f"Input {input_index}: Working camera {camera.name}")
-            else:
-                # Failed camera - use placeholder
-                reason = "timeout" if camera in self.failed_cameras else "offline"
-                placeholder_input = self._create_placeholder_for_camera(camera, reason)
-                cmd.extend(placeholder_input.split())
-                input_sources.append(("placeholder", camera))
-                self.logger.debug(f"Input {input_index}: Placeholder for {camera.name} ({reason})")
-        
-        # Build filter complex
-        filter_parts = []
-        
-        # Scale each input to its target size
-        for i, (source_type, camera) in enumerate(input_sources):
-            scale_filter = f"[{i}:v]scale={camera.width}:{camera.height}[v{i}]"
-            filter_parts.append(scale_filter)
-        
-        # Create black background
-        filter_parts.append(f"color=black:{self.display_config.screen_width}x{self.display_config.screen_height}[bg]")
-        
-        # Overlay each camera at its position
-        overlay_chain = "[bg]"
-        for i, (source_type, camera) in enumerate(input_sources):
-            if i == len(input_sources) - 1:
-                # Last overlay
-                overlay = f"{overlay_chain}[v{i}]overlay={camera.x}:{camera.y},format=rgb565le[out]"
-            else:
-                overlay = f"{overlay_chain}[v{i}]overlay={camera.x}:{camera.y}[bg{i}]"
-                overlay_chain = f"[bg{i}]"
-            filter_parts.append(overlay)
+        if self.display_config.output == "drm":
+            # SDL2 on its KMS/DRM backend page-flips the composite at vsync and
+            # converts YUV on the display side instead of via RGB565 memcpys
+            cmd.extend([
+                "-f", "sdl2",
+                "-window_fullscreen", "1",
+                "-window_borderless", "1",
+                "smartpicam"
+            ])
+        elif self._panned_fb:
+            # Whole frames come back over stdout and are flipped onto the display here
+            cmd.extend([
+                "-f", "rawvideo",
+                "-pix_fmt", "rgb565le",
+                "pipe:1"
+            ])
+        else:
+            cmd.extend([
+                "-f", "fbdev", "/dev/fb0",
+                "-pix_fmt", "rgb565le"
+            ])
         
-        # Join all filters
-        filter_string = ";".join(filter_parts)
+        return cmd
+    
+    def _rtsp_options_request(self, url: str) -> Optional[Tuple[str, int, bytes]]:
+        """Build the (host, port, request) for an RTSP OPTIONS probe, or None for non-RTSP URLs"""
+        try:
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme != "rtsp" or not parts.hostname:
+                return None
+            port = parts.port or 554
+        except ValueError:
+            return None
         
-        cmd.extend([
-            "-filter_complex", filter_string,
-            "-map", "[out]",
-            "-f", "fbdev", "/dev/fb0",
-            "-pix_fmt", "rgb565le"
-        ])
+        # Never send the credentials from the URL in the request line
+        request_url = urllib.parse.urlunsplit(("rtsp", f"{parts.hostname}:{port}", parts.path, parts.query, ""))
+        request = f"OPTIONS {request_url} RTSP/1.0\r\nCSeq: 1\r\nUser-Agent: smartpicam\r\n\r\n".encode()
+        return parts.hostname, port, request
+    
+    async def _probe_rtsp(self, camera: Camera, timeout: float = 2.0) -> bool:
+        """Probe a camera with RTSP OPTIONS, falling back to an ffmpeg test if inconclusive"""
+        probe = None
+        target = self._rtsp_options_request(camera.url)
         
-        return cmd
+        if target:
+            host, port, request = target
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                try:
+                    writer.write(request)
+                    response = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+                finally:
+                    writer.close()
+                if response.startswith(b"RTSP/1.0 200"):
+                    probe = True
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass  # Answered, but not with a usable RTSP reply
+            except (OSError, asyncio.TimeoutError):
+                probe = False
+        
+        if probe is not None:
+            return probe
+        
+        # Only ambiguous answers pay for an ffmpeg process
+        return await self._test_single_camera(camera)
     
-    def _test_single_camera(self, camera: Camera) -> bool:
-        """Test a single camera stream"""
+    async def _probe_all(self, cameras: List[Camera]) -> List[Tuple[Camera, bool]]:
+        """Probe all given cameras concurrently"""
+        results = await asyncio.gather(*[self._probe_rtsp(camera) for camera in cameras])
+        now = time.time()  # Wall clock so saved entries can outlive this process
+        for camera, success in zip(cameras, results):
+            self._probe_cache[camera.url] = (now, success)
+        self._save_probe_cache()
+        return list(zip(cameras, results))
+    
+    def _probe_with_cache(self, cameras: List[Camera]) -> List[Tuple[Camera, bool]]:
+        """Probe cameras, reusing results younger than PROBE_CACHE_TTL"""
+        now = time.time()
+        results = {}
+        stale = []
+        for camera in cameras:
+            cached = self._probe_cache.get(camera.url)
+            if cached and now - cached[0] < PROBE_CACHE_TTL:
+                results[camera.name] = cached[1]
+            else:
+                stale.append(camera)
+        if stale:
+            results.update((camera.name, success) for camera, success in asyncio.run(self._probe_all(stale)))
+        return [(camera, results[camera.name]) for camera in cameras]
+    
+    async def _test_single_camera(self, camera: Camera) -> bool:
+        """Test a single camera stream with ffmpeg, awaited on the event loop rather than a thread"""
         test_cmd = [
             "ffmpeg", "-y", "-loglevel", "error",
             "-timeout", "8000000",  # 8 second timeout
-            "-rtsp_transport", "tcp",
+            *RTSP_INPUT_ARGS,
             "-i", camera.url,
-            "-t", "1",
+            "-frames:v", "1",  # Done as soon as one frame decodes
             "-f", "null", "-"
         ]
         
         try:
-            result = subprocess.run(test_cmd, capture_output=True, timeout=10, text=True)
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, Exception):
+            process = await asyncio.create_subprocess_exec(
+                *test_cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            return False
+        
+        try:
+            return await asyncio.wait_for(process.wait(), 10) == 0
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
             return False
     
     def _test_camera_streams_parallel(self) -> bool:
         """Test camera streams in parallel and separate working from failed"""
         self.logger.info("Testing camera streams...")
         
-        def test_camera(camera):
-            success = self._test_single_camera(camera)
+        working_cameras = {}
+        failed_cameras = {}
+        
+        # Restarts right after a probe skip the RTSP handshakes entirely
+        for camera, success in self._probe_with_cache(self.cameras):
             if success:
-                self.logger.info(f"✓ {camera.name} stream OK")
+                self.logger.info("✓ %s stream OK", camera.name)
+                working_cameras[camera.name] = camera
             else:
-                self.logger.warning(f"✗ {camera.name} stream failed")
-            return camera, success
-        
-        working_cameras = []
-        failed_cameras = []
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(self.cameras), 5)) as executor:
-            future_to_camera = {executor.submit(test_camera, camera): camera 
-                               for camera in self.cameras}
-            
-            for future in concurrent.futures.as_completed(future_to_camera, timeout=30):
-                try:
-                    camera, success = future.result()
-                    if success:
-                        working_cameras.append(camera)
-                    else:
-                        failed_cameras.append(camera)
-                except Exception as e:
-                    camera = future_to_camera[future]
-                    self.logger.warning(f"Test error for {camera.name}: {e}")
-                    failed_cameras.append(camera)
+                self.logger.warning("✗ %s stream failed", camera.name)
+                failed_cameras[camera.name] = camera
         
-        self.working_cameras = working_cameras
-        self.failed_cameras = failed_cameras
+        with self._slot_lock:
+            self.working_cameras = working_cameras
+            self.failed_cameras = failed_cameras
         
-        self.logger.info(f"Stream test complete: {len(working_cameras)}/{len(self.cameras)} cameras working")
+        self.logger.info("Stream test complete: %d/%d cameras working", len(working_cameras), len(self.cameras))
         
         if failed_cameras:
-            failed_names = [cam.name for cam in failed_cameras]
-            self.logger.info(f"Will show placeholders for: {', '.join(failed_names)}")
+            self.logger.info("Will show placeholders for: %s", ", ".join(failed_cameras))
         
         return len(self.cameras) > 0
     
+    def _schedule_camera_retry(self):
+        """Arm the next failed-camera retry on the monitor's scheduler"""
+        self._scheduler.enter(self.display_config.camera_retry_interval, 1, self._retry_failed_cameras)
+    
     def _retry_failed_cameras(self):
-        """Periodically test failed cameras and bring them back online"""
-        while self.running and self.display_config.enable_camera_retry:
-            time.sleep(self.display_config.camera_retry_interval)
-            
+        """Test failed cameras and bring them back online, then re-arm for the next interval"""
+        try:
             if not self.running or not self.failed_cameras:
-                continue
+                return
             
-            self.logger.info(f"Retrying failed cameras: {[cam.name for cam in self.failed_cameras]}")
+            self.logger.info("Retrying failed cameras: %s", list(self.failed_cameras))
             
             recovered_cameras = []
-            still_failed = []
             
-            for camera in self.failed_cameras:
-                if self._test_single_camera(camera):
-                    self.logger.info(f"🔄 {camera.name} recovered - bringing back online")
+            for camera, success in asyncio.run(self._probe_all(list(self.failed_cameras.values()))):
+                if success:
+                    self.logger.info("🔄 %s recovered - bringing back online", camera.name)
                     recovered_cameras.append(camera)
-                else:
-                    still_failed.append(camera)
             
             if recovered_cameras:
-                self.working_cameras.extend(recovered_cameras)
-                self.failed_cameras = still_failed
-                self.camera_status_changed.set()
+                with self._slot_lock:
+                    for camera in recovered_cameras:
+                        self.failed_cameras.pop(camera.name, None)
+                        self.working_cameras[camera.name] = camera
                 
-                recovered_names = [cam.name for cam in recovered_cameras]
-                self.logger.info(f"✅ Cameras recovered: {', '.join(recovered_names)}")
+                # Swap each recovered slot to its live stream without touching the others
+                for camera in recovered_cameras:
+                    self._swap_slot(camera.slot, camera)
+                
+                self.logger.info("✅ Cameras recovered: %s", ", ".join(cam.name for cam in recovered_cameras))
+        finally:
+            if self.running:
+                self._schedule_camera_retry()
     
     def start_display(self) -> bool:
-        """Start the FFmpeg grid display with placeholders"""
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            self.logger.warning("Display already running")
-            return True
-        
-        self._hide_cursor()
-        
-        # Show initial placeholders immediately
-        self._show_initial_placeholders()
-        
-        # Test streams and identify working/failed cameras
-        if not self._test_camera_streams_parallel():
-            self.logger.error("No cameras configured")
-            return False
-            
-        cmd = self._build_ffmpeg_grid_command()
-        if not cmd:
-            self.logger.error("Failed to build FFmpeg command")
-            return False
-        
-        self.logger.info("Starting FFmpeg grid display with placeholders...")
-        self.logger.info(f"FFmpeg command: {' '.join(cmd)}")
-        
-        try:
-            env = os.environ.copy()
-            env.pop('DISPLAY', None)
+        """Start the compositor with a placeholder in every slot, then bring working cameras live"""
+        # Held throughout, so stop_display can never run while children are being started
+        with self._display_lock:
+            if self._shutdown_evt.is_set():
+                return False  # A restart racing shutdown must not outlive the final teardown
+            if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
+                self.logger.warning("Display already running")
+                return True
             
-            self.ffmpeg_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=lambda: signal.signal(signal.SIGINT, signal.SIG_IGN),
-                env=env
-            )
+            self._hide_cursor()
             
-            # Wait and check if it started
-            time.sleep(3)
+            # Show initial placeholders immediately
+            self._show_initial_placeholders()
             
-            if self.ffmpeg_process.poll() is None:
-                self.logger.info("FFmpeg grid display started successfully")
-                self._log_camera_layout()
-                return True
-            else:
-                stdout, stderr = self.ffmpeg_process.communicate()
-                self.logger.error(f"FFmpeg failed to start:")
-                if stderr:
-                    self.logger.error(f"STDERR: {stderr.decode()}")
-                if stdout:
-                    self.logger.error(f"STDOUT: {stdout.decode()}")
+            cmd = self._grid_cmd
+            if not cmd:
+                self.logger.error("Failed to build FFmpeg command")
                 return False
+            
+            self.logger.info("Starting FFmpeg grid display with placeholders...")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("FFmpeg command: %s", shlex.join(cmd))
+            
+            # Every slot starts on its placeholder until its stream tests OK
+            self.working_cameras = {}
+            self.failed_cameras = {}
+            
+            try:
+                self._write_filter_script()
+                self._create_slot_fifos()
+                for i, camera in enumerate(self.cameras):
+                    self._start_slot(i, camera)
                 
-        except Exception as e:
-            self.logger.error(f"Failed to start FFmpeg: {e}")
+                if not self._start_compositor():
+                    self._stop_all_slots()
+                    return False
+                    
+            except Exception as e:
+                self.logger.error("Failed to start FFmpeg: %s", e)
+                self._stop_all_slots()
+                return False
+            
+            self.logger.info("FFmpeg grid display started successfully")
+            
+            # Test streams and switch the working ones from placeholder to live
+            self._test_camera_streams_parallel()
+            for i, camera in enumerate(self.cameras):
+                if camera.name in self.working_cameras:
+                    self._swap_slot(i, camera)
+            
+            self._log_camera_layout()
+            return True
+    
+    def _start_compositor(self) -> bool:
+        """Launch the compositor on the already-running slot pipes and wait for its first frame"""
+        env = os.environ.copy()
+        env.pop('DISPLAY', None)
+        if self.display_config.output == "drm":
+            env['SDL_VIDEODRIVER'] = 'kmsdrm'
+        
+        self.ffmpeg_process = subprocess.Popen(
+            self._grid_cmd,
+            stdin=subprocess.DEVNULL,
+            # Output goes to the display, or to the panning writer; progress comes on stderr
+            stdout=subprocess.PIPE if self._panned_fb else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            start_new_session=True,  # Off the terminal's Ctrl-C; keeps the vfork/posix_spawn path
+            env=env
+        )
+        self._prioritise_ffmpeg(self.ffmpeg_process.pid)
+        
+        if not self._wait_for_first_frame():
+            _, stderr = self.ffmpeg_process.communicate()
+            self.logger.error("FFmpeg failed to start:")
+            if self._ffmpeg_stderr_tail or stderr:
+                self.logger.error("STDERR: %s", self._stderr_text(stderr))
+            self.ffmpeg_process = None
             return False
+        
+        threading.Thread(target=self._drain_stderr, args=(self.ffmpeg_process,), daemon=True).start()
+        if self._panned_fb:
+            self._panned_fb.start(self.ffmpeg_process.stdout)
+        return True
+    
+    def _restart_compositor(self) -> bool:
+        """Replace a dead compositor without touching the slot producers or their camera connections"""
+        with self._display_lock:
+            if self._shutdown_evt.is_set():
+                return False
+            if self.ffmpeg_process:
+                self.ffmpeg_process.wait()
+                self.ffmpeg_process = None
+            # The slot pipes stay open through their keepalive handles, so producers
+            # keep their camera connections; only the pipes' contents are thrown away
+            try:
+                self._resync_slot_pipes()
+                return self._start_compositor()
+            except Exception as e:
+                self.logger.error("Failed to restart compositor: %s", e)
+                return False
+    
+    def _keep_stderr_lines(self, data: bytes):
+        """Remember recent stderr lines, skipping the -progress key=value noise"""
+        for line in data.splitlines():
+            if line and not (b"=" in line and b" " not in line):
+                self._ffmpeg_stderr_tail.append(line)
+    
+    def _stderr_text(self, remainder: bytes = b"") -> str:
+        """Recent compositor stderr as text"""
+        self._keep_stderr_lines(remainder or b"")
+        return b"\n".join(self._ffmpeg_stderr_tail).decode(errors="replace")
+    
+    def _wait_for_first_frame(self, timeout: float = COMPOSITOR_START_TIMEOUT) -> bool:
+        """Wait until the compositor reports its first frame, or exits"""
+        stderr = self.ffmpeg_process.stderr
+        self._ffmpeg_stderr_tail.clear()
+        os.set_blocking(stderr.fileno(), False)
+        try:
+            pending = b""
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if self.ffmpeg_process.poll() is not None:
+                    return False
+                ready, _, _ = select.select([stderr], [], [], 0.05)
+                if not ready:
+                    continue
+                chunk = os.read(stderr.fileno(), 4096)
+                if not chunk:
+                    return False  # stderr closed - the process is on its way out
+                complete, _, pending = (pending + chunk).rpartition(b"\n")
+                self._keep_stderr_lines(complete)
+                # -progress opens with frame=0 before anything is out; ready means a real frame
+                for line in complete.splitlines():
+                    key, _, value = line.partition(b"=")
+                    if key == b"frame" and value.strip().isdigit() and int(value) > 0:
+                        return True
+            # No progress yet but still alive - slow inputs, not a failure
+            return self.ffmpeg_process.poll() is None
+        finally:
+            os.set_blocking(stderr.fileno(), True)
+    
+    def _drain_stderr(self, process: subprocess.Popen):
+        """Keep the compositor's stderr pipe empty so -progress output never blocks it"""
+        for line in process.stderr:
+            self._keep_stderr_lines(line)
     
     def _log_camera_layout(self):
         """Log the camera layout"""
         self.logger.info("Camera layout:")
         for camera in self.cameras:
-            status = "WORKING" if camera in self.working_cameras else "PLACEHOLDER"
-            self.logger.info(f"  {camera.name}: ({camera.x},{camera.y}) {camera.width}x{camera.height} [{status}]")
+            status = "WORKING" if camera.name in self.working_cameras else "PLACEHOLDER"
+            self.logger.info("  %s: (%d,%d) %dx%d [%s]", camera.name, camera.x, camera.y,
+                             camera.width, camera.height, status)
+    
+    def _stop_all_slots(self):
+        """Stop every slot producer and remove the named pipes"""
+        with self._slot_lock:
+            for i in list(self.slot_processes):
+                self._stop_slot(i)
+            self._remove_slot_fifos()
     
     def stop_display(self):
-        """Stop the FFmpeg display"""
-        if self.ffmpeg_process:
-            try:
-                self.ffmpeg_process.terminate()
-                self.ffmpeg_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self.ffmpeg_process.kill()
-                self.ffmpeg_process.wait()
-            finally:
-                self.ffmpeg_process = None
+        """Stop the FFmpeg display; a concurrent or repeated call finds nothing left to stop"""
+        with self._display_lock:
+            # Producers go first while the compositor is still draining their pipes;
+            # closing the pipes then hands the compositor EOF on every input
+            self._stop_all_slots()
+            
+            process, self.ffmpeg_process = self.ffmpeg_process, None
+            if process:
+                try:
+                    process.terminate()
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
                 self.logger.info("FFmpeg display stopped")
-        
-        self._show_cursor()
+            
+            self._show_cursor()
                 
     def is_healthy(self) -> bool:
         """Check if display is running properly"""
         return self.ffmpeg_process is not None and self.ffmpeg_process.poll() is None
+    
+    def _slot_stalled(self, index: int, camera: Camera) -> bool:
+        """Whether a live slot's producer is still running but has stopped delivering frames"""
+        if camera.name not in self.working_cameras:
+            return False
+        return time.monotonic() - self.slot_buffers[index].last_frame > SLOT_STALL_TIMEOUT
+    
+    def _check_slots(self):
+        """Respawn dead or stalled slot producers, dropping lost cameras back to their placeholder"""
+        for i, camera in enumerate(self.cameras):
+            with self._slot_lock:
+                process = self.slot_processes.get(i)
+                if process is not None and process.poll() is None:
+                    if not self._slot_stalled(i, camera):
+                        continue
+                    self.logger.warning("%s stream stalled - no frame for %.0fs", camera.name,
+                                        time.monotonic() - self.slot_buffers[i].last_frame)
+                    process.kill()
+                    process.wait()
+                
+                if camera.name in self.working_cameras:
+                    self.logger.warning("%s stream dropped - showing placeholder", camera.name)
+                    errors = self._slot_log_tail(i)
+                    if errors:
+                        self.logger.warning("Last errors from %s: %s", camera.name, errors)
+                    self.failed_cameras[camera.name] = self.working_cameras.pop(camera.name)
+                    self._probe_cache.pop(camera.url, None)
+                    # The camera may have moved; resolve its hostname again for the reconnect
+                    self._forget_resolution(camera.url)
+                    camera.live_cmd = self._build_slot_command(i, camera, live=True)
+                else:
+                    self.logger.warning("Placeholder for %s exited - restarting it", camera.name)
+                
+                self._swap_slot(i, camera)
         
+    def _wake_monitor(self):
+        """Wake the monitor from its wait; lock-free, so safe from a signal handler"""
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # The pipe is full of wake-ups already
+    
+    def _on_child_exit(self, signum, frame):
+        """SIGCHLD handler - wake the monitor; Popen.poll() does the reaping"""
+        self._wake_monitor()
+    
     def monitor_display(self):
-        """Monitor and restart display if it fails or cameras recover"""
+        """Monitor the compositor and the per-camera slot producers"""
+        self._pin_to_housekeeping()
         restart_count = 0
         
         while self.running:
-            display_failed = not self.is_healthy()
-            camera_status_changed = self.camera_status_changed.is_set()
+            # Due periodic jobs (failed-camera retries) share this thread; the
+            # scheduler reports how long until the next one
+            next_job = self._scheduler.run(blocking=False)
             
-            if display_failed or camera_status_changed:
-                if camera_status_changed:
-                    self.logger.info("Camera status changed - restarting display to include recovered cameras")
-                    self.camera_status_changed.clear()
-                    restart_count = 0
-                elif display_failed:
-                    if restart_count >= self.display_config.restart_retries:
-                        self.logger.error(f"Max restart attempts ({self.display_config.restart_retries}) reached")
-                        break
-                    
-                    restart_count += 1
-                    self.logger.warning(f"Display unhealthy, restarting ({restart_count}/{self.display_config.restart_retries})")
-                    
-                    # Log any error output
-                    if self.ffmpeg_process:
-                        try:
-                            stdout, stderr = self.ffmpeg_process.communicate(timeout=1)
-                            if stderr:
-                                self.logger.error(f"FFmpeg error: {stderr.decode()}")
-                        except:
-                            pass
+            # Sleep until some child exits, shutdown wakes us or a job falls due; the
+            # stall timeout catches producers that stay alive but stop delivering frames
+            select.select([self._wake_r], [], [],
+                          SLOT_STALL_TIMEOUT if next_job is None else min(next_job, SLOT_STALL_TIMEOUT))
+            self._empty_fifo(self._wake_r)
+            if not self.running:
+                break
+            
+            if not self.is_healthy():
+                if restart_count >= self.display_config.restart_retries:
+                    self.logger.error("Max restart attempts (%d) reached", self.display_config.restart_retries)
+                    break
+                
+                restart_count += 1
+                self.logger.warning("Display unhealthy, restarting (%d/%d)", restart_count, self.display_config.restart_retries)
                 
-                self.stop_display()
-                time.sleep(3)
+                # Log any error output collected by the stderr drain
+                if self.ffmpeg_process and self._ffmpeg_stderr_tail:
+                    self.logger.error("FFmpeg error: %s", self._stderr_text())
                 
-                if self.start_display():
+                if self._shutdown_evt.wait(3):
+                    break
+                
+                # Cameras stay connected while only the compositor is replaced;
+                # a full teardown is the fallback
+                if self._restart_compositor():
                     restart_count = 0
-                    
-            time.sleep(10)
+                    self._check_slots()  # Catch up on any slot that exited meanwhile
+                else:
+                    self.stop_display()
+                    if self.start_display():
+                        restart_count = 0
+                    else:
+                        self._wake_monitor()  # Nothing left to exit - go round again
+            else:
+                # Compositor is fine - only individual slots ever need replacing
+                self._check_slots()
             
     def run(self):
         """Main run loop"""
-        if not self.load_config():
-            return False
+        # The framebuffer geometry and console cursor are restored however this returns
+        try:
+            if not self.load_config():
+                return False
             
-        if not self.start_display():
-            self.logger.error("Failed to start display")
-            return False
+            if not self.start_display():
+                self.logger.error("Failed to start display")
+                return False
             
-        self.running = True
-        
-        # Start monitoring thread
-        monitor_thread = threading.Thread(target=self.monitor_display, daemon=True)
-        monitor_thread.start()
-        
-        # Start camera retry thread if enabled
-        if self.display_config.enable_camera_retry:
-            retry_thread = threading.Thread(target=self._retry_failed_cameras, daemon=True)
-            retry_thread.start()
-            self.logger.info("Camera auto-recovery thread started")
-        
-        try:
-            while self.running:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            self.logger.info("Shutting down...")
+            self.running = True
+            signal.signal(signal.SIGCHLD, self._on_child_exit)
+            
+            # Failed-camera retries run on the monitor thread's scheduler
+            if self.display_config.enable_camera_retry:
+                self._schedule_camera_retry()
+                self.logger.info("Camera auto-recovery scheduled")
+            
+            # Start monitoring thread
+            monitor_thread = threading.Thread(target=self.monitor_display, daemon=True)
+            monitor_thread.start()
+            
+            try:
+                self._shutdown_evt.wait()
+            except KeyboardInterrupt:
+                self.logger.info("Shutting down...")
+            finally:
+                self.running = False
+                # Also on Ctrl-C, so no restart can start after this. Normally the signal handler
+                # has set it already, and skipping set() keeps its lock out of a repeat signal's way
+                if not self._shutdown_evt.is_set():
+                    self._shutdown_evt.set()
+                self._wake_monitor()
+                # Let an in-flight restart finish before the one final teardown
+                monitor_thread.join(timeout=MONITOR_JOIN_TIMEOUT)
+            
+            return True
         finally:
             self.stop_display()
-            
-        return True
+            if self._panned_fb:
+                self._panned_fb.close()
 
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
     global app
     if 'app' in globals():
-        app.stop_display()
-    sys.exit(0)
+        app._shutdown_evt.set()
+    else:
+        sys.exit(0)
 
 def main():
     global app
@@ -9,19 +9,28 @@ Repository: https://github.com/aotearoait/smartpicam
 """
 
 import os
+import re
 import sys
 import json
+import base64
+import socket
 import time
 import subprocess
 import threading
 import logging
 import urllib.request
 import urllib.parse
+import concurrent.futures
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 import argparse
 
+# Video codec advertised in an SDP: the first rtpmap inside the first m=video section,
+# which runs until the next m= line so a later audio rtpmap can never match
+SDP_VIDEO_SECTION = re.compile(r"^m=video .*?(?=^m=|\Z)", re.MULTILINE | re.DOTALL)
+SDP_RTPMAP = re.compile(r"^a=rtpmap:\d+ ([\w.-]+)/", re.MULTILINE)
+
 @dataclass
 class ValidationResult:
     """Result of a validation test"""
@@ -64,7 +73,100 @@ class StreamTester:
                 f"Connection test failed: {str(e)}"
             )
     
+    def _rtsp_describe(self, url: str, basic_auth: bool = False) -> Tuple[int, List[str], str]:
+        """Send an RTSP DESCRIBE and return the status code, every WWW-Authenticate challenge and the SDP body"""
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or 554
+        # Keep credentials out of the request line; they only go out when a Basic challenge asks for them
+        request_url = urllib.parse.urlunsplit(("rtsp", f"{parts.hostname}:{port}", parts.path, parts.query, ""))
+        request = f"DESCRIBE {request_url} RTSP/1.0\r\nCSeq: 1\r\nAccept: application/sdp\r\nUser-Agent: smartpicam-validator\r\n"
+        if basic_auth and parts.username:
+            credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+            request += f"Authorization: Basic {base64.b64encode(credentials.encode()).decode()}\r\n"
+        request += "\r\n"
+        
+        with socket.create_connection((parts.hostname, port), timeout=min(self.timeout, 5)) as sock:
+            sock.sendall(request.encode())
+            response = b""
+            while b"\r\n\r\n" not in response:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                response += chunk
+            head, _, body = response.partition(b"\r\n\r\n")
+            lines = head.decode(errors="replace").split("\r\n")
+            status = int(lines[0].split()[1]) if lines[0].startswith("RTSP/") else 0
+            length = next((int(line.split(":", 1)[1]) for line in lines[1:]
+                           if line.lower().startswith("content-length:")), 0)
+            # A server may offer several schemes, one header each
+            challenges = [line.split(":", 1)[1].strip() for line in lines[1:]
+                          if line.lower().startswith("www-authenticate:")]
+            while len(body) < length:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                body += chunk
+        return status, challenges, body.decode(errors="replace")
+    
     def _test_rtsp_connectivity(self, url: str) -> ValidationResult:
+        """Test RTSP stream connectivity, reading the codec from DESCRIBE before falling back to ffprobe"""
+        # One round trip usually answers it; ffprobe costs a process plus a full SETUP/PLAY
+        has_credentials = bool(urllib.parse.urlsplit(url).username)
+        schemes: List[str] = []
+        basic_offered = False
+        try:
+            status, challenges, sdp = self._rtsp_describe(url)
+            schemes = [challenge.split(" ", 1)[0] for challenge in challenges]
+            basic_offered = any(scheme.lower() == "basic" for scheme in schemes)
+            # Credentials only ever go out in the clear when the server offers Basic
+            if status == 401 and has_credentials and basic_offered:
+                status, _, sdp = self._rtsp_describe(url, basic_auth=True)
+        except OSError as e:
+            return ValidationResult(
+                "Stream Connectivity",
+                False,
+                "Stream not accessible",
+                f"RTSP connection error: {e}"
+            )
+        except (ValueError, IndexError):
+            status, sdp = 0, ""  # Not a well-formed RTSP reply; let ffprobe judge
+        
+        if status == 200:
+            section = SDP_VIDEO_SECTION.search(sdp)
+            match = section and SDP_RTPMAP.search(section.group(0))
+            if match:
+                return ValidationResult(
+                    "Stream Connectivity",
+                    True,
+                    "Stream accessible and valid",
+                    f"Codec: {match.group(1)} (from RTSP DESCRIBE)"
+                )
+        elif status == 401 and not has_credentials:
+            return ValidationResult(
+                "Stream Connectivity",
+                False,
+                "Authentication required",
+                f"RTSP DESCRIBE: 401 ({', '.join(schemes) or 'no'} challenge) - add credentials to the camera URL"
+            )
+        elif status == 401 and basic_offered:
+            return ValidationResult(
+                "Stream Connectivity",
+                False,
+                "Authentication failed",
+                "RTSP DESCRIBE: 401 - the server rejected the URL's credentials"
+            )
+        elif status == 404:
+            return ValidationResult(
+                "Stream Connectivity",
+                False,
+                "Stream not accessible",
+                "RTSP DESCRIBE: 404 Not Found"
+            )
+        
+        # Digest-only servers, odd servers or an SDP without video: ffprobe checks the credentials too
+        return self._test_rtsp_with_ffprobe(url)
+    
+    def _test_rtsp_with_ffprobe(self, url: str) -> ValidationResult:
         """Test RTSP stream connectivity using ffprobe"""
         try:
             cmd = [
@@ -290,6 +392,9 @@ def main():
                 if enabled_cameras:
                     print(f"🎥 Testing {len(enabled_cameras)} enabled camera streams...")
                     
+                    # Each test is dominated by waiting on the camera, so run them all at once
+                    # and the whole pass takes as long as the slowest camera
+                    tests = []
                     for camera in enabled_cameras:
                         name = camera.get('name', 'unknown')
                         url = camera.get('url', '')
@@ -300,14 +405,18 @@ def main():
                         print(f"  Testing {name}: {url}")
                         
                         if args.test_streams:
-                            result = stream_tester.test_stream_connectivity(url)
-                            result.test_name = f"Stream Test ({name})"
-                            all_results.append(result)
+                            tests.append((f"Stream Test ({name})", stream_tester.test_stream_connectivity, (url,)))
                         
                         if args.test_vlc:
-                            result = stream_tester.test_vlc_playback(url, 10)
-                            result.test_name = f"VLC Test ({name})"
-                            all_results.append(result)
+                            tests.append((f"VLC Test ({name})", stream_tester.test_vlc_playback, (url, 10)))
+                    
+                    if tests:
+                        with concurrent.futures.ThreadPoolExecutor(max_workers=len(tests)) as executor:
+                            futures = [(test_name, executor.submit(test, *test_args)) for test_name, test, test_args in tests]
+                            for test_name, future in futures:
+                                result = future.result()
+                                result.test_name = test_name
+                                all_results.append(result)
                 else:
                     print("❌ No enabled cameras found in configuration")
                     